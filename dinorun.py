@@ -1,284 +1,378 @@
-# FILE: dinorun.py
-
-import pygame
-import sys
-import random
-import requests  # Menggunakan library requests untuk komunikasi HTTP
-import logging
-import json
-import os
-import time
-
-# Konfigurasi
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s:%(name)s:%(message)s')
-os.environ['GAME_SERVER'] = 'localhost'
-
-# Inisialisasi Pygame dan konstanta
-pygame.init()
-pygame.mixer.init()
-WIDTH, HEIGHT = 1000, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Dino Runner - Multiplayer (HTTP)")
-clock = pygame.time.Clock()
-FPS = 30
-WHITE, BLACK, GREEN, BROWN, GRAY, BLUE, ORANGE, RED, GOLD = ((255,255,255), (0,0,0), (34,139,34), (139,69,19), (128,128,128), (135,206,235), (255,165,0), (255,0,0), (255, 215, 0))
-GROUND_HEIGHT = HEIGHT - 100
-GRAVITY, JUMP_STRENGTH, OBSTACLE_SPEED, SPAWN_RATE = 0.8, -15, 8, 120
-
-# --- KELAS CLIENTINTERFACE BARU BERBASIS HTTP ---
-class ClientInterface:
-    def __init__(self):
-        server_host = os.getenv('GAME_SERVER', 'localhost')
-        self.base_url = f"http://{server_host}:55555"
-        self.player_id = None
-        self.logger = logging.getLogger(__name__)
-
-    def _make_request(self, method, endpoint, params=None, data=None):
-        try:
-            if method.upper() == 'GET':
-                response = requests.get(f"{self.base_url}{endpoint}", params=params, timeout=2.0)
-            elif method.upper() == 'POST':
-                response = requests.post(f"{self.base_url}{endpoint}", json=data, timeout=2.0)
-            else:
-                return None
-            
-            response.raise_for_status()  # Cek jika ada error HTTP (4xx atau 5xx)
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self.logger.warning(f"Request failed: {e}")
-            return None
-
-    def register(self):
-        response = self._make_request('POST', '/register')
-        if response and response.get('status') == 'OK':
-            self.player_id = response.get('player_id')
-            return self.player_id
-        return None
-
-    def get_game_state(self):
-        if not self.player_id: return None
-        return self._make_request('GET', '/gamestate', params={'player_id': self.player_id})
-
-    def update_player_state(self, x, y, is_jumping, is_ducking, score):
-        if not self.player_id: return None
-        payload = {
-            'player_id': self.player_id, 'x': x, 'y': y,
-            'is_jumping': is_jumping, 'is_ducking': is_ducking, 'score': score
-        }
-        return self._make_request('POST', '/update', data=payload)
-
-    def set_ready(self):
-        if not self.player_id: return None
-        return self._make_request('POST', '/ready', data={'player_id': self.player_id})
-
-    def send_game_over(self, score):
-        if not self.player_id: return None
-        return self._make_request('POST', '/gameover', data={'player_id': self.player_id, 'score': score})
-
-# --- KELAS-KELAS GAME (TIDAK BERUBAH) ---
-class Obstacle:
-    def __init__(self, obstacle_type, x, y):
-        self.type, self.x, self.y, self.width, self.height, self.speed = obstacle_type, x, y, 40 if obstacle_type == 'rock' else 60, 40 if obstacle_type == 'rock' else 30, OBSTACLE_SPEED
-    def update(self): self.x -= self.speed
-    def draw(self, surface):
-        color, border_color = (GRAY, BLACK) if self.type == 'rock' else (BROWN, BLACK)
-        pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-        pygame.draw.rect(surface, border_color, (self.x, self.y, self.width, self.height), 2)
-    def get_rect(self): return pygame.Rect(self.x, self.y, self.width, self.height)
-
-class Dinosaur:
-    def __init__(self, player_id, client_interface, x=100, is_remote=False):
-        self.id, self.client, self.x, self.is_remote = player_id, client_interface, x, is_remote
-        self.y, self.width, self.height, self.score = GROUND_HEIGHT - 60, 50, 60, 0
-        self.vel_y, self.is_jumping, self.is_ducking, self.color = 0, False, False, GREEN if not is_remote else ORANGE
-    def jump(self):
-        if not self.is_jumping and not self.is_ducking: self.is_jumping, self.vel_y = True, JUMP_STRENGTH
-    def duck(self, is_ducking):
-        if not self.is_jumping:
-            if is_ducking and not self.is_ducking: self.is_ducking, self.height, self.y = True, 30, GROUND_HEIGHT - 30
-            elif not is_ducking and self.is_ducking: self.is_ducking, self.height, self.y = False, 60, GROUND_HEIGHT - 60
-    def update(self, keys_pressed=None):
-        if not self.is_remote and keys_pressed:
-            if (keys_pressed[pygame.K_SPACE] or keys_pressed[pygame.K_UP]): self.jump()
-            self.duck(keys_pressed[pygame.K_DOWN])
-        if self.is_jumping:
-            self.vel_y += GRAVITY; self.y += self.vel_y
-            if self.y >= GROUND_HEIGHT - self.height: self.y, self.is_jumping, self.vel_y = GROUND_HEIGHT - self.height, False, 0
-        if not self.is_remote: self.score += 1; self.client.update_player_state(self.x, self.y, self.is_jumping, self.is_ducking, self.score)
-    def set_state_from_server(self, server_data):
-        self.x, self.y, self.score = server_data.get('x', self.x), server_data.get('y', self.y), server_data.get('score', self.score)
-        self.duck(server_data.get('is_ducking', False)); self.is_jumping = server_data.get('is_jumping', False)
-    def draw(self, surface, is_game_over=False):
-        color = self.color if not is_game_over else GRAY
-        pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
-        pygame.draw.rect(surface, BLACK, (self.x, self.y, self.width, self.height), 2)
-        font = pygame.font.Font(None, 24); text = font.render(f"P{self.id} ({self.score})", True, BLACK)
-        surface.blit(text, (self.x + 5, self.y - 25))
-    def get_rect(self): return pygame.Rect(self.x, self.y, self.width, self.height)
-
-class Game:
-    def __init__(self):
-        self.client = ClientInterface()
-        self.local_player, self.remote_players, self.obstacles = None, {}, []
-        self.spawn_timer, self.is_ready = 0, False
-        self.logger = logging.getLogger(__name__)
-
-    def initialize_connection(self):
-        self.logger.info("Connecting to server...")
-        player_id = self.client.register()
-        if player_id:
-            self.logger.info(f"Successfully connected! You are Player {player_id}.")
-            self.local_player = Dinosaur(player_id, self.client, 100)
-            return True
-        self.logger.error("Failed to connect to the server. Exiting.")
-        return False
-
-    def run(self):
-        try:
-            pygame.mixer.music.load('assets/bg_music.mp3')
-            pygame.mixer.music.set_volume(0.5)
-            pygame.mixer.music.play(loops=-1)
-            self.logger.info("Background music is playing.")
-        except pygame.error as e:
-            self.logger.warning(f"Could not load or play music 'assets/bg_music.mp3': {e}")
-
-        if not self.initialize_connection():
-            pygame.quit()
-            sys.exit()
-        
-        if self.lobby_loop():
-            self.game_loop()
-        
-        self.logger.info("Thank you for playing!")
-        pygame.quit()
-        sys.exit()
-
-    def lobby_loop(self):
-        self.client.update_player_state(self.local_player.x, self.local_player.y, False, False, 0)
-        while True:
-            server_state = self.client.get_game_state()
-            if not server_state:
-                self.logger.error("Connection to server lost. Exiting.")
-                return False
-            
-            if server_state.get('game_started', False):
-                return True
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                    return False
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_r and not self.is_ready:
-                    self.client.set_ready()
-                    self.is_ready = True
-                    
-            self.draw_lobby_screen(server_state.get('all_players', {}))
-            pygame.display.flip()
-            clock.tick(10)
-    
-    def game_loop(self):
-        running, local_game_over, sent_game_over = True, False, False
-        while running:
-            server_state = self.client.get_game_state()
-            if not server_state or self.local_player.id not in server_state.get('all_players', {}):
-                self.logger.info("Game over or disconnected by server.")
-                time.sleep(5)
-                running = False
-                continue
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                    running = False
-            
-            if not local_game_over:
-                self.local_player.update(pygame.key.get_pressed())
-                self.spawn_obstacle()
-                self.update_obstacles()
-                if self.check_collisions():
-                    local_game_over = True
-            
-            if local_game_over and not sent_game_over:
-                self.client.send_game_over(self.local_player.score)
-                sent_game_over = True
-
-            self.update_remote_players(server_state)
-            self.draw_game_elements(local_game_over, server_state)
-            pygame.display.flip()
-            clock.tick(FPS)
-    
-    def draw_game_elements(self, local_game_over, server_state):
-        self.draw_background(screen)
-        for o in self.obstacles: o.draw(screen)
-        self.local_player.draw(screen, local_game_over)
-        for pid, player in self.remote_players.items():
-            player_data = server_state.get('all_players', {}).get(pid)
-            if player_data:
-                 player.draw(screen, player_data.get('state') == 'game_over')
-        self.draw_ui(screen)
-        if server_state.get('winner'):
-            self.draw_winner_screen(server_state['winner'])
-        elif local_game_over:
-            font = pygame.font.Font(None, 72); text = font.render("GAME OVER", True, BLACK)
-            screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
-
-    def draw_winner_screen(self, winner_info):
-        font_big, font_med = pygame.font.Font(None, 80), pygame.font.Font(None, 50)
-        winner_text = font_big.render(f"WINNER: PLAYER {winner_info['id']}", True, GOLD)
-        score_text = font_med.render(f"Score: {winner_info['score']}", True, WHITE)
-        screen.blit(winner_text, (WIDTH//2 - winner_text.get_width()//2, HEIGHT//2 - 60))
-        screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 + 20))
-
-    def draw_lobby_screen(self, players_data):
-        screen.fill(BLUE)
-        font_title, font_info, font_player = pygame.font.Font(None, 72), pygame.font.Font(None, 36), pygame.font.Font(None, 32)
-        title_text = font_title.render("Waiting for Players...", True, BLACK)
-        screen.blit(title_text, (WIDTH//2 - title_text.get_width()//2, 50))
-        ready_text = font_info.render("Press 'R' to Ready Up!" if not self.is_ready else "You are Ready!", True, WHITE)
-        screen.blit(ready_text, (WIDTH//2 - ready_text.get_width()//2, 150))
-        y_offset = 250
-        for pid, pdata in sorted(players_data.items()):
-            state, color = ("READY", GREEN) if pdata.get('state') == 'ready' else ("WAITING", RED)
-            player_text = font_player.render(f"Player {pid}: {state}", True, color)
-            screen.blit(player_text, (WIDTH//2 - player_text.get_width()//2, y_offset)); y_offset += 40
-
-    def spawn_obstacle(self):
-        if self.spawn_timer <= 0:
-            obstacle_type = random.choice(['rock', 'pterodactyl']); y = GROUND_HEIGHT - 40 if obstacle_type == 'rock' else GROUND_HEIGHT - 70
-            self.obstacles.append(Obstacle(obstacle_type, WIDTH, y))
-            self.spawn_timer = random.randint(max(30, 120 - self.local_player.score // 10), SPAWN_RATE)
-        else: self.spawn_timer -= 1
-        
-    def update_obstacles(self):
-        for o in self.obstacles[:]:
-            o.update()
-            if o.x + o.width < 0: self.obstacles.remove(o)
-            
-    def check_collisions(self): return any(self.local_player.get_rect().colliderect(o.get_rect()) for o in self.obstacles)
-    
-    def update_remote_players(self, server_state):
-        if 'all_players' not in server_state: return
-        server_players = dict(server_state['all_players'])
-        if self.local_player.id in server_players: del server_players[self.local_player.id]
-        
-        current_pids = set(self.remote_players.keys())
-        server_pids = set(server_players.keys())
-        
-        for pid in current_pids - server_pids: del self.remote_players[pid]
-            
-        for pid, pdata in server_players.items():
-            if pid not in self.remote_players:
-                self.remote_players[pid] = Dinosaur(pid, self.client, 100, True)
-            self.remote_players[pid].set_state_from_server(pdata)
-            
-    def draw_background(self, surface):
-        surface.fill(BLUE)
-        pygame.draw.rect(surface, GREEN, (0, GROUND_HEIGHT, WIDTH, HEIGHT - GROUND_HEIGHT))
-        pygame.draw.line(surface, BLACK, (0, GROUND_HEIGHT), (WIDTH, GROUND_HEIGHT), 3)
-        
-    def draw_ui(self, surface):
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {self.local_player.score}", True, BLACK)
-        surface.blit(score_text, (10, 10))
-
-if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+# FILE: dinorun.py
+# Import modul ini tidak menyentuh display maupun audio: pygame baru diinisialisasi saat
+# PygameRenderer/PygameAudio dibuat, sehingga Game bisa dijalankan headless (bot, replay, CI).
+
+import argparse
+import pygame
+import sys
+import logging
+import os
+import time
+from collections import deque, defaultdict
+from functools import lru_cache
+from dinorun_client import ClientInterface, STATE_TRANSPORT  # Komunikasi HTTP dengan server
+from dinorun_sim import WIDTH, HEIGHT, GROUND_HEIGHT, GRAVITY, JUMP_STRENGTH, TICK_RATE, PlayerSim, ObstacleField
+
+# Konstanta
+FPS = TICK_RATE  # Satu frame = satu tick simulasi server
+WHITE, BLACK, GREEN, BROWN, GRAY, BLUE, ORANGE, RED, GOLD = ((255,255,255), (0,0,0), (34,139,34), (139,69,19), (128,128,128), (135,206,235), (255,165,0), (255,0,0), (255, 215, 0))
+# Pemain remote dirender sedikit di belakang snapshot terbaru agar selalu ada dua snapshot untuk interpolasi
+INTERP_DELAY, SNAPSHOT_BUFFER = 0.15, 8
+# Jumlah surface teks yang disimpan; label skor berubah tiap tick, sisanya teks statis
+TEXT_CACHE_SIZE = 256
+MUSIC_PATH = 'assets/bg_music.mp3'
+
+# --- CACHE RENDER ---
+_fonts = {}
+
+def get_font(size):
+    """Font default per ukuran, dimuat sekali saja (memuat Font mem-parse file font)."""
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, size, color):
+    return get_font(size).render(text, True, color)
+
+# --- KELAS-KELAS GAME ---
+class Dinosaur(PlayerSim):
+    """Fisika dari dinorun_sim (sama persis dengan simulasi server) ditambah rendering."""
+    def __init__(self, player_id, client_interface, x=100, is_remote=False):
+        super().__init__(x)
+        self.id, self.client, self.is_remote = player_id, client_interface, is_remote
+        self.color = GREEN if not is_remote else ORANGE
+        # Lokal: tombol terakhir yang dikirim. Remote: snapshot (t, x, y, is_jumping) dari server
+        self.last_input = (False, False)
+        self.snapshots = deque(maxlen=SNAPSHOT_BUFFER)
+    def update(self, keys_pressed, tick):
+        """Satu tick prediksi lokal; perubahan tombol dikirim ke server bersama nomor tick-nya."""
+        jump = bool(keys_pressed and (keys_pressed[pygame.K_SPACE] or keys_pressed[pygame.K_UP]))
+        duck = bool(keys_pressed and keys_pressed[pygame.K_DOWN])
+        if (jump, duck) != self.last_input:
+            self.client.send_input(tick, jump, duck); self.last_input = (jump, duck)
+        self.apply_input(jump, duck); self.step()
+    def set_state_from_server(self, server_data, received_at=None):
+        self.score = server_data.get('score', self.score)
+        self.duck(server_data.get('is_ducking', False)); self.is_jumping = server_data.get('is_jumping', False)
+        if server_data.get('x') is not None and server_data.get('y') is not None:
+            t = received_at if received_at is not None else time.monotonic()
+            self.snapshots.append((t, server_data['x'], server_data['y'], self.is_jumping))
+            if len(self.snapshots) == 1: self.x, self.y = server_data['x'], server_data['y']
+    def interpolate(self, now):
+        """Menghitung posisi render pemain remote pada (now - INTERP_DELAY) dari buffer snapshot.
+        Di antara dua snapshot lompatan posisi mengikuti parabola GRAVITY; setelah snapshot terakhir
+        lompatan diekstrapolasi dengan fisika yang sama sampai menyentuh tanah."""
+        if not self.snapshots: return
+        render_time, ground = now - INTERP_DELAY, GROUND_HEIGHT - self.height
+        snaps = self.snapshots
+        if render_time <= snaps[0][0]:
+            self.x, self.y = snaps[0][1], snaps[0][2]; return
+        for i in range(len(snaps) - 1):
+            (t0, x0, y0, j0), (t1, x1, y1, j1) = snaps[i], snaps[i + 1]
+            if render_time <= t1:
+                a = (render_time - t0) / (t1 - t0) if t1 > t0 else 1.0
+                self.x = x0 + (x1 - x0) * a
+                if j0 and j1 and t1 > t0:
+                    # Fisika per frame: setelah n frame, y = y0 + n*v0 + GRAVITY*n*(n+1)/2
+                    n = (t1 - t0) * FPS; k = n * a
+                    v0 = (y1 - y0) / n - GRAVITY * (n + 1) / 2
+                    self.y = min(y0 + v0 * k + GRAVITY * k * (k + 1) / 2, ground)
+                else:
+                    self.y = y0 + (y1 - y0) * a
+                return
+        t1, x1, y1, j1 = snaps[-1]
+        self.x, self.y = x1, y1
+        if not j1: return
+        if len(snaps) >= 2 and snaps[-2][3] and t1 > snaps[-2][0]:
+            t0, y0 = snaps[-2][0], snaps[-2][2]; n = (t1 - t0) * FPS
+            v1 = (y1 - y0) / n + GRAVITY * (n - 1) / 2
+        else:
+            # Server menyiarkan tiap tick, jadi snapshot lompatan pertama berada sekitar satu frame setelah lompat
+            v1 = JUMP_STRENGTH + GRAVITY
+        m = (render_time - t1) * FPS
+        self.y = min(y1 + v1 * m + GRAVITY * m * (m + 1) / 2, ground)
+    def draw(self, surface, is_game_over=False):
+        """Menggambar dino beserta labelnya dan mengembalikan area layar yang tersentuh."""
+        color = self.color if not is_game_over else GRAY
+        body = pygame.draw.rect(surface, color, (self.x, self.y, self.width, self.height))
+        pygame.draw.rect(surface, BLACK, (self.x, self.y, self.width, self.height), 2)
+        label = surface.blit(render_text(f"P{self.id} ({self.score})", 24, BLACK), (self.x + 5, self.y - 25))
+        return body.union(label)
+
+# --- RENDERER DAN AUDIO ---
+class PygameRenderer:
+    """Window pygame. Layer statis digambar sekali; tiap frame hanya area yang digambar
+    (dirty rect) yang dipulihkan dan di-update."""
+    def __init__(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Dino Runner - Multiplayer (HTTP)")
+        self.background, self.lobby_background = self.build_background(), self.build_lobby_background()
+        self.layer, self.dirty_rects = None, []
+
+    def events(self): return pygame.event.get()
+    def pressed_keys(self): return pygame.key.get_pressed()
+    def close(self): pygame.quit()
+
+    def begin_frame(self, layer):
+        """Memulihkan area yang digambar frame sebelumnya dari layer statis. Saat layer berganti
+        (lobby -> game) seluruh layar digambar ulang sekali."""
+        if layer is not self.layer:
+            self.layer, self.dirty_rects = layer, [self.screen.blit(layer, (0, 0))]
+        else:
+            self.dirty_rects = [self.screen.blit(layer, rect, rect) for rect in self.dirty_rects]
+
+    def end_frame(self, drawn):
+        """Meng-update area yang dipulihkan ditambah area yang baru digambar, bukan seluruh layar."""
+        pygame.display.update(self.dirty_rects + drawn)
+        self.dirty_rects = drawn
+
+    def draw_lobby(self, game):
+        self.begin_frame(self.lobby_background)
+        self.end_frame(self.draw_lobby_screen(game.server_players, game.is_ready))
+
+    def draw_game(self, game, local_game_over):
+        self.begin_frame(self.background)
+        self.end_frame(self.draw_game_elements(game, local_game_over))
+
+    def draw_game_elements(self, game, local_game_over):
+        screen = self.screen
+        drawn = [self.draw_obstacle(screen, o) for o in game.field.obstacles]
+        drawn.append(game.local_player.draw(screen, local_game_over))
+        for pid, player in game.remote_players.items():
+            player_data = game.server_players.get(pid)
+            if player_data:
+                 drawn.append(player.draw(screen, player_data.get('state') == 'game_over'))
+        drawn.append(self.draw_ui(screen, game.local_player.score))
+        if game.winner:
+            drawn.extend(self.draw_winner_screen(game.winner))
+        elif local_game_over:
+            text = render_text("GAME OVER", 72, BLACK)
+            drawn.append(screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2)))
+        return drawn
+
+    def draw_winner_screen(self, winner_info):
+        winner_text = render_text(f"WINNER: PLAYER {winner_info['id']}", 80, GOLD)
+        score_text = render_text(f"Score: {winner_info['score']}", 50, WHITE)
+        return [self.screen.blit(winner_text, (WIDTH//2 - winner_text.get_width()//2, HEIGHT//2 - 60)),
+                self.screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 + 20))]
+
+    def draw_lobby_screen(self, players_data, is_ready):
+        ready_text = render_text("Press 'R' to Ready Up!" if not is_ready else "You are Ready!", 36, WHITE)
+        drawn = [self.screen.blit(ready_text, (WIDTH//2 - ready_text.get_width()//2, 150))]
+        y_offset = 250
+        for pid, pdata in sorted(players_data.items()):
+            state, color = ("READY", GREEN) if pdata.get('state') == 'ready' else ("WAITING", RED)
+            player_text = render_text(f"Player {pid}: {state}", 32, color)
+            drawn.append(self.screen.blit(player_text, (WIDTH//2 - player_text.get_width()//2, y_offset))); y_offset += 40
+        return drawn
+
+    def draw_obstacle(self, surface, o):
+        color, border_color = (GRAY, BLACK) if o.type == 'rock' else (BROWN, BLACK)
+        rect = pygame.draw.rect(surface, color, (o.x, o.y, o.width, o.height))
+        pygame.draw.rect(surface, border_color, (o.x, o.y, o.width, o.height), 2)
+        return rect
+
+    def build_background(self):
+        surface = pygame.Surface((WIDTH, HEIGHT)).convert()
+        surface.fill(BLUE)
+        pygame.draw.rect(surface, GREEN, (0, GROUND_HEIGHT, WIDTH, HEIGHT - GROUND_HEIGHT))
+        pygame.draw.line(surface, BLACK, (0, GROUND_HEIGHT), (WIDTH, GROUND_HEIGHT), 3)
+        return surface
+
+    def build_lobby_background(self):
+        surface = pygame.Surface((WIDTH, HEIGHT)).convert()
+        surface.fill(BLUE)
+        title_text = render_text("Waiting for Players...", 72, BLACK)
+        surface.blit(title_text, (WIDTH//2 - title_text.get_width()//2, 50))
+        return surface
+
+    def draw_ui(self, surface, score):
+        return surface.blit(render_text(f"Score: {score}", 36, BLACK), (10, 10))
+
+class HeadlessRenderer:
+    """Renderer tanpa display: tidak menggambar apa pun. Bot mengisi `keys` (kode tombol
+    pygame -> bool) sebelum setiap tick dan bisa menitipkan event di `queued_events`."""
+    def __init__(self): self.keys, self.queued_events = defaultdict(bool), []
+    def events(self):
+        events, self.queued_events = self.queued_events, []
+        return events
+    def pressed_keys(self): return self.keys
+    def close(self): pass
+    def draw_lobby(self, game): pass
+    def draw_game(self, game, local_game_over): pass
+
+class PygameAudio:
+    def __init__(self):
+        pygame.mixer.init()
+        self.logger = logging.getLogger(__name__)
+    def play_music(self, path):
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(0.5)
+            pygame.mixer.music.play(loops=-1)
+            self.logger.info("Background music is playing.")
+        except pygame.error as e:
+            self.logger.warning(f"Could not load or play music '{path}': {e}")
+
+class NullAudio:
+    def play_music(self, path): pass
+
+class Game:
+    def __init__(self, renderer=None, audio=None, client=None, throttle=True):
+        """Tanpa argumen Game membuka window dan audio pygame seperti biasa. Untuk mode headless
+        berikan HeadlessRenderer/NullAudio; throttle=False melepas batas FPS sehingga prediksi
+        lokal maju satu tick per iterasi loop, secepat CPU mengizinkan. Itu hanya untuk stepping
+        offline (replay, bot lokal): server berjalan sesuai jam dinding, jadi klien yang terhubung
+        ke server harus tetap di-throttle agar tick yang dikirim lewat /input tidak mendahului server."""
+        self.client = client or ClientInterface()
+        self.renderer = renderer if renderer is not None else PygameRenderer()
+        self.audio = audio if audio is not None else PygameAudio()
+        self.clock = pygame.time.Clock() if throttle else None
+        self.local_player, self.remote_players = None, {}
+        # Salinan lokal state server, dibangun dari delta /gamestate
+        self.server_players, self.game_started, self.winner, self.seed = {}, False, None, None
+        # Rintangan diputar ulang dari seed room, jadi sama dengan yang disimulasikan server
+        self.field, self.tick, self.is_ready = None, 0, False
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def headless(cls, client=None, throttle=True):
+        return cls(HeadlessRenderer(), NullAudio(), client, throttle)
+
+    def initialize_connection(self):
+        self.logger.info("Connecting to server...")
+        player_id = self.client.register()
+        if player_id:
+            self.logger.info(f"Successfully connected! You are Player {player_id} in room {self.client.room_id}.")
+            self.local_player = Dinosaur(player_id, self.client, 100)
+            self.client.start(use_stream=STATE_TRANSPORT == 'stream')
+            return True
+        self.logger.error("Failed to connect to the server. Exiting.")
+        return False
+
+    def run(self):
+        self.audio.play_music(MUSIC_PATH)
+
+        if not self.initialize_connection():
+            self.renderer.close()
+            sys.exit()
+        
+        if self.lobby_loop():
+            self.game_loop()
+        
+        self.logger.info("Thank you for playing!")
+        self.client.close()
+        self.renderer.close()
+        sys.exit()
+
+    def wait_frame(self, fps):
+        if self.clock: self.clock.tick(fps)
+
+    def lobby_loop(self):
+        while True:
+            server_states = self.client.receive_states()
+            if server_states is None:
+                self.logger.error("Connection to server lost. Exiting.")
+                return False
+            for server_state in server_states: self.apply_server_state(server_state)
+            
+            if self.game_started:
+                return True
+                
+            for event in self.renderer.events():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    return False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    self.set_ready()
+                    
+            self.renderer.draw_lobby(self)
+            # Lobby hanya menunggu jaringan, jadi tetap dijeda walaupun tidak di-throttle
+            if self.clock: self.clock.tick(10)
+            else: time.sleep(0.1)
+
+    def set_ready(self):
+        if not self.is_ready:
+            self.client.set_ready()
+            self.is_ready = True
+
+    def start_match(self):
+        self.field, self.tick = ObstacleField(self.seed), 0
+
+    def step(self, keys):
+        """Satu tick prediksi lokal, urutannya sama dengan MatchSim.step (input + fisika,
+        rintangan, tabrakan). Mengembalikan True bila dino lokal menabrak."""
+        self.local_player.update(keys, self.tick)
+        self.field.step(self.tick)
+        self.tick += 1
+        return self.field.collides(self.local_player.get_rect())
+    
+    def game_loop(self):
+        running, local_game_over = True, False
+        self.start_match()
+        match_start = time.monotonic()
+        while running:
+            server_states = self.client.receive_states()
+            for server_state in server_states or []: self.apply_server_state(server_state)
+            if server_states is None or self.local_player.id not in self.server_players:
+                self.logger.info("Game over or disconnected by server.")
+                if self.clock: time.sleep(5)
+                running = False
+                continue
+
+            for event in self.renderer.events():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+            
+            # Prediksi lokal dengan timestep tetap: tick dikejar sesuai jam dinding, atau tepat
+            # satu tick per iterasi bila tidak di-throttle
+            keys = self.renderer.pressed_keys()
+            target_tick = int((time.monotonic() - match_start) * TICK_RATE) if self.clock else self.tick + 1
+            while not local_game_over and self.tick < target_tick:
+                local_game_over = self.step(keys)
+
+            # Server yang menentukan game over dan skor resmi
+            server_self = self.server_players.get(self.local_player.id, {})
+            if server_self.get('state') == 'game_over':
+                local_game_over = True
+                self.local_player.score = server_self.get('score', self.local_player.score)
+
+            now = time.monotonic()
+            for player in self.remote_players.values(): player.interpolate(now)
+            self.renderer.draw_game(self, local_game_over)
+            self.wait_frame(FPS)
+
+    def apply_server_state(self, server_state):
+        """Menggabungkan delta (atau snapshot penuh) dari /gamestate ke salinan lokal."""
+        players = server_state.get('players', {})
+        removed = set(server_state.get('removed', []))
+        if server_state.get('full'):
+            removed |= set(self.server_players) - set(players)
+            self.server_players = {}
+        for pid in removed: self.server_players.pop(pid, None)
+        for pid, pdata in players.items():
+            self.server_players.setdefault(pid, {}).update(pdata)
+        if 'game_started' in server_state: self.game_started, self.seed = server_state['game_started'], server_state.get('seed')
+        if 'winner' in server_state: self.winner = server_state['winner']
+        if self.local_player: self.update_remote_players(players, removed, server_state.get('received_at'))
+
+    def update_remote_players(self, changed_players, removed_pids, received_at=None):
+        for pid in removed_pids: self.remote_players.pop(pid, None)
+        for pid in changed_players:
+            if pid == self.local_player.id: continue
+            if pid not in self.remote_players:
+                self.remote_players[pid] = Dinosaur(pid, self.client, 100, True)
+            self.remote_players[pid].set_state_from_server(self.server_players[pid], received_at)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s:%(name)s:%(message)s')
+    os.environ['GAME_SERVER'] = 'localhost'
+    parser = argparse.ArgumentParser(description="DinoRun client")
+    parser.add_argument('--headless', action='store_true', default=os.getenv('HEADLESS') == '1',
+                        help="Tanpa window dan audio, langsung ready; tetap berjalan sesuai jam dinding server")
+    args = parser.parse_args()
+    game = Game.headless() if args.headless else Game()
+    if args.headless: game.renderer.queued_events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_r))
+    game.run()
@@ -0,0 +1,182 @@
+# FILE: dinorun_bench.py
+# Load generator headless untuk server DinoRun: N pemain simulasi menjalankan siklus lengkap
+# (register, ready, /input + /gamestate pada Hz tertentu) memakai protokol ClientInterface.
+# Setelah match selesai (ada pemenang) pemain mendaftar dan ready lagi untuk match berikutnya.
+
+import argparse
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from dinorun_client import ClientInterface
+from dinorun_sim import TICK_RATE
+
+class BenchClient(ClientInterface):
+    """ClientInterface yang mencatat latensi dan error setiap request (mode sinkron, tanpa thread I/O)."""
+
+    def __init__(self, stats, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+
+    def _make_request(self, method, endpoint, params=None, data=None):
+        start = time.perf_counter()
+        result = super()._make_request(method, endpoint, params, data)
+        self.stats.record(endpoint, time.perf_counter() - start, result is None)
+        return result
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        # Room yang match-nya sudah selesai (dilihat dari pemenang di /gamestate)
+        self.finished_rooms = set()
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, latency, failed):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + failed
+
+    def match_finished(self, room_id):
+        with self.lock:
+            self.finished_rooms.add(room_id)
+
+def percentile(sorted_values, p):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+def read_proc_stat(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        return f.read().rsplit(')', 1)[1].split()
+
+def read_cpu_seconds(pid):
+    """CPU (user + system) sebuah proses beserta proses anaknya (worker mode multi-proses) dari
+    /proc; None jika tidak tersedia (non-Linux)."""
+    try:
+        fields = read_proc_stat(pid)
+        ticks = int(fields[11]) + int(fields[12])
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit(): continue
+            try:
+                child = read_proc_stat(entry)
+            except OSError:
+                continue
+            if child[1] == str(pid): ticks += int(child[11]) + int(child[12])
+        return ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return None
+
+def simulated_player(args, stats, start_barrier, stop_event):
+    client = BenchClient(stats, args.host, args.port)
+    client.wire_format = args.wire
+    if not client.register():
+        return
+    start_barrier.wait()
+    client.set_ready()
+    interval = 1.0 / args.hz
+    # Fase acak agar pemain tidak menembak server pada saat yang sama persis
+    next_tick = time.monotonic() + random.random() * interval
+    # Tombol acak bergantian lompat/lepas; tick diperkirakan dari jam lokal sejak match dimulai,
+    # seperti klien game. Sebelum match dimulai (lobby) hanya /gamestate yang dikirim.
+    match_start, jump = None, False
+    while not stop_event.is_set():
+        delay = next_tick - time.monotonic()
+        if delay > 0: time.sleep(delay)
+        next_tick += interval
+        if match_start is not None:
+            jump = random.random() < 0.5 if not jump else False
+            client.send_input(int((time.monotonic() - match_start) * TICK_RATE), jump, False)
+        state = client.get_game_state()
+        if not state:
+            continue
+        if state.get('game_started') and match_start is None:
+            match_start = time.monotonic()
+        # Match selesai, atau pemain sudah dibuang dari room (reset/idle): request berikutnya
+        # hanya akan mengukur jalur pemain tanpa room, jadi daftar ulang untuk match baru
+        if state.get('winner') or state.get('room_id') is None:
+            if state.get('winner'): stats.match_finished(client.room_id)
+            client.state_version, match_start = 0, None
+            if not client.register():
+                break
+            client.set_ready()
+    client.close()
+
+def spawn_server(args):
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server_thread_pool_http.py'),
+           '--mode', args.server_mode, '--port', str(args.port), '--workers', str(args.workers),
+           '--processes', str(args.server_processes)]
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    return server
+
+def run(args):
+    server = spawn_server(args) if args.spawn_server else None
+    server_pid = server.pid if server else args.server_pid
+    stats = Stats()
+    stop_event = threading.Event()
+    start_barrier = threading.Barrier(args.players + 1)
+    threads = [threading.Thread(target=simulated_player, args=(args, stats, start_barrier, stop_event), daemon=True)
+               for _ in range(args.players)]
+    for t in threads: t.start()
+    try:
+        start_barrier.wait(timeout=30)
+    except threading.BrokenBarrierError:
+        print("Not all players could register; aborting.")
+        stop_event.set()
+        if server: server.terminate()
+        return 1
+
+    cpu_start = read_cpu_seconds(server_pid) if server_pid else None
+    started = time.monotonic()
+    time.sleep(args.duration)
+    stop_event.set()
+    elapsed = time.monotonic() - started
+    cpu_end = read_cpu_seconds(server_pid) if server_pid else None
+    for t in threads: t.join(timeout=5)
+    if server:
+        server.terminate()
+        server.wait()
+
+    report(args, stats, elapsed, cpu_start, cpu_end)
+    return 0
+
+def report(args, stats, elapsed, cpu_start, cpu_end):
+    print(f"players={args.players} hz={args.hz} duration={elapsed:.1f}s wire={args.wire}")
+    print(f"{'endpoint':<12}{'requests':>10}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}")
+    total, total_errors, everything = 0, 0, []
+    for endpoint in sorted(stats.latencies):
+        values = sorted(stats.latencies[endpoint])
+        errors = stats.errors.get(endpoint, 0)
+        total += len(values); total_errors += errors; everything.extend(values)
+        print(f"{endpoint:<12}{len(values):>10}{len(values) / elapsed:>10.0f}{percentile(values, 0.50) * 1000:>9.2f}"
+              f"{percentile(values, 0.95) * 1000:>9.2f}{percentile(values, 0.99) * 1000:>9.2f}{errors:>9}")
+    everything.sort()
+    print(f"{'total':<12}{total:>10}{total / elapsed:>10.0f}{percentile(everything, 0.50) * 1000:>9.2f}"
+          f"{percentile(everything, 0.95) * 1000:>9.2f}{percentile(everything, 0.99) * 1000:>9.2f}{total_errors:>9}")
+    print(f"error rate: {total_errors / total * 100 if total else 0:.2f}%")
+    print(f"matches completed: {len(stats.finished_rooms)}")
+    if cpu_start is not None and cpu_end is not None:
+        cpu = cpu_end - cpu_start
+        print(f"server CPU: {cpu:.2f}s ({cpu / elapsed * 100:.0f}% of one core)")
+    else:
+        print("server CPU: n/a (use --spawn-server or --server-pid on Linux)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DinoRun server load generator")
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--hz', type=float, default=10.0, help="Frekuensi /input + /gamestate per pemain")
+    parser.add_argument('--duration', type=float, default=30.0, help="Lama fase bermain (detik)")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=55555)
+    parser.add_argument('--wire', choices=['binary', 'json'], default='binary')
+    parser.add_argument('--spawn-server', action='store_true', help="Jalankan server_thread_pool_http.py sebagai subprocess")
+    parser.add_argument('--server-mode', choices=['thread', 'async'], default='thread')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--server-processes', type=int, default=1, help="Jumlah proses worker server (lihat server_multiprocess.py)")
+    parser.add_argument('--server-pid', type=int, help="PID server yang sudah berjalan, untuk mengukur CPU")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(run(args))
@@ -0,0 +1,203 @@
+# FILE: dinorun_client.py
+# Lapisan jaringan klien DinoRun, terpisah dari pygame agar bisa dipakai bot dan load generator.
+
+import requests  # Menggunakan library requests untuk komunikasi HTTP
+import dinorun_wire as wire
+import logging
+import json
+import os
+import time
+import threading
+from collections import deque
+
+# 'stream': state di-push server lewat /stream, 'poll': GET /gamestate setiap frame
+STATE_TRANSPORT = os.getenv('STATE_TRANSPORT', 'stream')
+STREAM_READ_TIMEOUT = 10.0  # Server mengirim heartbeat tiap 5 detik
+POLL_RATE = 30  # Frekuensi GET /gamestate oleh thread I/O pada mode 'poll' (sama dengan FPS game)
+# 'binary': struct ringkas (dinorun_wire) untuk /input dan /gamestate, 'json': format lama
+WIRE_FORMAT = os.getenv('WIRE_FORMAT', 'binary')
+BINARY_ENDPOINTS = ('/input', '/gamestate')
+
+# --- KELAS CLIENTINTERFACE BARU BERBASIS HTTP ---
+class ClientInterface:
+    """Komunikasi HTTP dengan server. Setelah start(), semua request berjalan di thread I/O
+    sendiri: frame loop hanya menitipkan state keluar dan membaca state terbaru yang sudah
+    diterima, sehingga latensi server tidak pernah menahan rendering."""
+    # Poll /gamestate gagal berturut-turut sebanyak ini dianggap koneksi putus
+    MAX_POLL_FAILURES = 3
+    # Berapa kali mengikuti 421 (pindah worker) untuk satu request di server multi-proses
+    MAX_REDIRECTS = 3
+
+    def __init__(self, server_host=None, port=55555):
+        server_host = server_host or os.getenv('GAME_SERVER', 'localhost')
+        self.server_host = server_host
+        self.base_url = f"http://{server_host}:{port}"
+        self.player_id = None
+        self.token = None
+        self.room_id = None
+        self.wire_format = WIRE_FORMAT
+        # Versi state terakhir yang diterima; server hanya mengirim perubahan sesudahnya
+        self.state_version = 0
+        # State yang diterima thread I/O atau stream, diambil frame loop lewat receive_states()
+        self.incoming = deque()
+        # Perintah yang tidak boleh hilang (ready, input bertanda tick), dikirim berurutan
+        self.outgoing_commands = deque()
+        self.wakeup = threading.Event()
+        self.io_thread, self.stream_thread = None, None
+        self.stream_failed, self.poll_failures, self.closed = False, 0, False
+        self.logger = logging.getLogger(__name__)
+        # Session menyimpan koneksi HTTP/1.1 keep-alive, jadi tidak ada handshake TCP baru tiap frame.
+        # Setelah start(), session ini hanya dipakai oleh thread I/O.
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount('http://', adapter)
+
+    def _make_request(self, method, endpoint, params=None, data=None):
+        binary = self.wire_format == 'binary' and endpoint in BINARY_ENDPOINTS
+        headers = {'Accept': wire.CONTENT_TYPE} if binary else None
+        try:
+            for _ in range(self.MAX_REDIRECTS + 1):
+                if method.upper() == 'GET':
+                    response = self.session.get(f"{self.base_url}{endpoint}", params=params, headers=headers, timeout=2.0)
+                elif method.upper() == 'POST' and binary:
+                    headers['Content-Type'] = wire.CONTENT_TYPE
+                    response = self.session.post(f"{self.base_url}{endpoint}", data=wire.encode_input(data), headers=headers, timeout=2.0)
+                elif method.upper() == 'POST':
+                    response = self.session.post(f"{self.base_url}{endpoint}", json=data, timeout=2.0)
+                else:
+                    return None
+                if response.status_code != 421:
+                    break
+                # Server multi-proses: room atau matchmaking dipegang worker lain, ulangi di port-nya
+                self.base_url = f"http://{self.server_host}:{response.json()['port']}"
+            
+            response.raise_for_status()  # Cek jika ada error HTTP (4xx atau 5xx)
+            if response.headers.get('Content-Type') == wire.CONTENT_TYPE:
+                return wire.decode_state(response.content) if endpoint == '/gamestate' else {'status': 'OK'}
+            return response.json()
+        except requests.exceptions.HTTPError as e:
+            self.logger.warning(f"Request failed: {e}")
+            status = e.response.status_code if e.response is not None else None
+            if binary and (status == 415 or (status == 400 and method.upper() == 'POST')):
+                # Server yang menolak body biner (415, atau 400 dari server lama yang membacanya sebagai
+                # JSON): pakai JSON untuk seterusnya. Error lain (403, 404, 5xx, ...) tidak mengubah format.
+                self.logger.warning("Falling back to JSON wire format")
+                self.wire_format = 'json'
+            return None
+        except requests.exceptions.RequestException as e:
+            self.logger.warning(f"Request failed: {e}")
+            return None
+
+    def _send(self, endpoint, data):
+        """Kirim POST; setelah start() perintah diantrekan ke thread I/O dan langsung kembali."""
+        if self.io_thread is None:
+            return self._make_request('POST', endpoint, data=data)
+        self.outgoing_commands.append((endpoint, data))
+        self.wakeup.set()
+        return None
+
+    def start(self, use_stream=True):
+        """Menjalankan thread I/O (dan stream state jika use_stream); tanpa stream, thread I/O
+        yang melakukan poll /gamestate pada POLL_RATE."""
+        self.io_thread = threading.Thread(target=self._io_loop, args=(not use_stream,), name='client-io', daemon=True)
+        self.io_thread.start()
+        if use_stream:
+            self.stream_thread = threading.Thread(target=self._stream_reader, name='state-stream', daemon=True)
+            self.stream_thread.start()
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        if self.io_thread: self.io_thread.join(timeout=2.5)
+        self.session.close()
+
+    def _io_loop(self, poll):
+        interval = 1.0 / POLL_RATE
+        next_poll = time.monotonic()
+        while not self.closed:
+            self.wakeup.wait(max(0.0, next_poll - time.monotonic()) if poll else 0.5)
+            self.wakeup.clear()
+            try:
+                while self.outgoing_commands:
+                    endpoint, data = self.outgoing_commands.popleft()
+                    self._make_request('POST', endpoint, data=data)
+                if poll and time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + interval
+                    state = self.get_game_state()
+                    if state:
+                        self.poll_failures = 0
+                        self.incoming.append(state)
+                    else:
+                        self.poll_failures += 1
+            except Exception as e:
+                # Respons yang tidak bisa dibaca (421 tanpa port, body biner rusak, ...) tidak boleh
+                # mematikan thread ini diam-diam; pada mode poll dihitung sebagai poll gagal agar
+                # receive_states melapor putus (mode stream dipantau lewat stream_failed)
+                self.logger.error(f"Client I/O error: {e!r}")
+                if poll: self.poll_failures += 1
+
+    def _stream_reader(self):
+        session = requests.Session()
+        failures = 0
+        while not self.closed and failures < 3:
+            failures += 1
+            try:
+                params = {'player_id': self.player_id, 'since': self.state_version}
+                with session.get(f"{self.base_url}/stream", params=params, stream=True,
+                                 timeout=(2.0, STREAM_READ_TIMEOUT)) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if self.closed: break
+                        if line.startswith(b'data: '):
+                            state = json.loads(line[6:])
+                            state['received_at'] = time.monotonic()
+                            self.state_version = state.get('version', 0)
+                            self.incoming.append(state)
+                            failures = 0
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.logger.warning(f"State stream interrupted: {e}")
+            if not self.closed: time.sleep(0.5)
+        session.close()
+        self.stream_failed = True
+
+    def receive_states(self):
+        """Mengembalikan semua state yang diterima sejak panggilan terakhir (bisa kosong),
+        atau None jika koneksi ke server putus. Tidak pernah menunggu jaringan setelah start()."""
+        if self.io_thread is None:
+            state = self.get_game_state()
+            return [state] if state else None
+        states = []
+        while self.incoming: states.append(self.incoming.popleft())
+        if not states and (self.stream_failed or self.poll_failures >= self.MAX_POLL_FAILURES): return None
+        return states
+
+    def register(self):
+        response = self._make_request('POST', '/register')
+        if response and response.get('status') == 'OK':
+            self.player_id = response.get('player_id')
+            self.token = response.get('token')
+            self.room_id = response.get('room_id')
+            if response.get('port'):
+                # Server multi-proses: room ini dipegang satu worker, semua request berikutnya ke port-nya
+                self.base_url = f"http://{self.server_host}:{response['port']}"
+            return self.player_id
+        return None
+
+    def get_game_state(self):
+        if not self.player_id: return None
+        state = self._make_request('GET', '/gamestate', params={'player_id': self.player_id, 'since': self.state_version})
+        if state:
+            self.state_version = state.get('version', 0)
+            # Waktu terima dicatat di thread I/O, bukan saat frame loop mengambilnya: beberapa state
+            # bisa diambil sekaligus dalam satu frame dan interpolasi butuh jarak waktu aslinya
+            state['received_at'] = time.monotonic()
+        return state
+
+    def send_input(self, tick, jump, duck):
+        """Mengirim tombol yang ditekan mulai `tick`. Posisi dan skor dihitung server."""
+        if not self.player_id: return None
+        return self._send('/input', {'player_id': self.player_id, 'token': self.token, 'tick': tick, 'jump': jump, 'duck': duck})
+
+    def set_ready(self):
+        if not self.player_id: return None
+        return self._send('/ready', {'player_id': self.player_id, 'token': self.token})
@@ -1,131 +1,685 @@
-import json
-import time
-import logging
-import os
-from datetime import datetime
-
-class HttpServer:
-    def __init__(self):
-        self.players = {}
-        self.game_state = {'game_started': False, 'winner': None, 'game_over_time': None}
-        self.start_time = time.time()
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-        self.logger = logging.getLogger(__name__)
-
-    # --- FUNGSI LOGIKA GAME (Sebagian besar tidak berubah) ---
-    def reset_game(self):
-        self.players = {}
-        self.game_state = {'game_started': False, 'winner': None, 'game_over_time': None}
-
-    def register_new_player(self):
-        next_id = 1
-        while str(next_id) in self.players: next_id += 1
-        player_id = str(next_id)
-        self.players[player_id] = {'state': 'waiting', 'score': 0, 'last_seen': time.time()}
-        return {'status': 'OK', 'player_id': player_id}
-
-    def set_player_ready(self, player_id):
-        if player_id in self.players:
-            self.players[player_id]['state'] = 'ready'
-            if len(self.players) >= 2 and all(p.get('state') == 'ready' for p in self.players.values()):
-                self.game_state['game_started'] = True
-                for p_id in self.players: self.players[p_id]['state'] = 'playing'
-                self.logger.info("Game is starting!")
-        return {'status': 'OK'}
-
-    def update_player(self, data):
-        player_id = data.get('player_id')
-        if player_id in self.players:
-            self.players[player_id].update({
-                'x': data.get('x'), 'y': data.get('y'), 
-                'is_jumping': data.get('is_jumping'), 'is_ducking': data.get('is_ducking'),
-                'score': data.get('score'), 'last_seen': time.time()
-            })
-        return {'status': 'OK'}
-
-    def set_player_game_over(self, data):
-        player_id = data.get('player_id')
-        if player_id in self.players and self.players[player_id].get('state') == 'playing':
-            self.players[player_id]['state'] = 'game_over'
-            self.players[player_id]['score'] = data.get('score')
-            if not any(p.get('state') == 'playing' for p in self.players.values()):
-                winner = max(self.players.values(), key=lambda p: p.get('score', 0))
-                winner_id = next((pid for pid, p in self.players.items() if p == winner), None)
-                if winner_id:
-                    self.game_state['winner'] = {'id': winner_id, 'score': winner['score']}
-                    self.game_state['game_over_time'] = time.time()
-        return {'status': 'OK'}
-
-    def get_game_state(self, player_id):
-        current_time = time.time()
-        if player_id in self.players: self.players[player_id]['last_seen'] = current_time
-        if self.game_state.get('game_over_time') and current_time - self.game_state['game_over_time'] > 10:
-            self.reset_game()
-        active_players = {pid: p for pid, p in self.players.items() if current_time - p.get('last_seen', 0) < 15}
-        self.players = active_players
-        return {'game_started': self.game_state['game_started'], 'winner': self.game_state.get('winner'), 'all_players': self.players}
-
-    # --- FUNGSI HTTP DARI PROGJAR5 ---
-    def response(self, kode=200, message='OK', body=None, headers=None):
-        if headers is None: headers = {}
-        
-        body_bytes = b''
-        if body:
-            body_bytes = json.dumps(body).encode('utf-8')
-            headers['Content-Type'] = 'application/json'
-        
-        headers['Content-Length'] = str(len(body_bytes))
-        
-        tanggal = datetime.now().strftime('%c')
-        header_str = f"HTTP/1.0 {kode} {message}\r\n"
-        header_str += f"Date: {tanggal}\r\n"
-        header_str += "Server: DinoRunServer/1.0\r\n"
-        for k, v in headers.items():
-            header_str += f"{k}: {v}\r\n"
-        header_str += "\r\n"
-        
-        return header_str.encode('utf-8') + body_bytes
-
-    # --- INI ADALAH BAGIAN UTAMA: API ROUTER ---
-    def proses(self, data):
-        try:
-            lines = data.split('\r\n')
-            request_line = lines[0]
-            method, path, _ = request_line.split(' ')
-            
-            # Ekstrak body untuk POST request
-            body_dict = {}
-            if method == 'POST' and '\r\n\r\n' in data:
-                body_str = data.split('\r\n\r\n', 1)[1]
-                if body_str: body_dict = json.loads(body_str)
-
-            # Routing berdasarkan path dan method
-            if method == 'POST' and path == '/register':
-                response_body = self.register_new_player()
-                return self.response(200, 'OK', response_body)
-
-            if method == 'POST' and path == '/ready':
-                player_id = body_dict.get('player_id')
-                response_body = self.set_player_ready(player_id)
-                return self.response(200, 'OK', response_body)
-
-            if method == 'POST' and path == '/update':
-                response_body = self.update_player(body_dict)
-                return self.response(200, 'OK', response_body)
-                
-            if method == 'POST' and path == '/gameover':
-                response_body = self.set_player_game_over(body_dict)
-                return self.response(200, 'OK', response_body)
-
-            if method == 'GET' and path.startswith('/gamestate'):
-                # Ekstrak player_id dari query parameter
-                player_id = path.split('?player_id=')[1]
-                response_body = self.get_game_state(player_id)
-                return self.response(200, 'OK', response_body)
-
-            # Jika tidak ada path yang cocok
-            return self.response(404, 'Not Found', {'error': 'Endpoint not found'})
-
-        except Exception as e:
-            self.logger.error(f"Error processing request: {e}")
-            return self.response(500, 'Internal Server Error', {'error': str(e)})
\ No newline at end of file
+import json
+import time
+import logging
+import os
+import random
+import struct
+import threading
+import itertools
+import hmac
+import math
+import secrets
+from collections import deque
+from datetime import datetime
+import dinorun_wire as wire
+import dinorun_sim as sim
+from dinorun_timers import DeadlineScheduler
+from dinorun_metrics import Metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from dinorun_matchlog import MatchRecording, MatchLogWriter, Leaderboard, DEFAULT_PATH as DEFAULT_MATCH_LOG, repair_log
+from dinorun_parser import ParseError, parse_request
+
+class PlayerRecord:
+    """State satu pemain. Setiap record punya lock sendiri sehingga simulasi room
+    dan pembaca state tidak saling menunggu. `version` adalah versi state terakhir
+    yang mengubah record ini; `last_seen` (time.monotonic) dan `token` disimpan terpisah karena tidak dikirim ke klien."""
+    __slots__ = ('lock', 'data', 'version', 'last_seen', 'token')
+
+    def __init__(self, version, token=None, **data):
+        self.lock = threading.Lock()
+        self.data = data
+        self.version = version
+        self.last_seen = time.monotonic()
+        # Rahasia pemain dari /register; hanya pemegangnya yang boleh mengirim /input dan /ready
+        self.token = token
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    def update(self, fields, bump):
+        """Menerapkan fields; versi baru (dari `bump`) hanya diambil jika ada nilai yang berubah."""
+        with self.lock:
+            data = self.data
+            if any(data.get(k) != v for k, v in fields.items()):
+                data.update(fields)
+                self.version = bump()
+                return True
+            return False
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.data)
+
+class Room:
+    """Satu match berisi 2-8 pemain dengan lobby, ready check, pemenang, dan timer reset sendiri.
+    Lock per room membuat room menjadi shard: aktivitas di satu match tidak mengunci match lain."""
+    MIN_PLAYERS, MAX_PLAYERS = 2, 8
+    # Simulasi berjalan INPUT_DELAY tick di belakang jam dinding agar input bertanda tick dari klien
+    # sempat tiba sebelum tick tersebut disimulasikan
+    INPUT_DELAY = 6
+    # Input yang mengaku terlalu jauh di depan tick simulasi dipotong ke batas ini
+    MAX_INPUT_LEAD = sim.TICK_RATE
+    # Skor pemain yang masih hidup disalin ke record setiap sekian tick (bukan tiap tick)
+    SCORE_SYNC_TICKS = 10
+    # Jumlah penghapusan pemain yang diingat; klien yang tertinggal lebih jauh menerima snapshot penuh
+    MAX_TOMBSTONES = 64
+    # Pemain tanpa request selama IDLE_TIMEOUT detik dibuang; room di-reset RESET_DELAY detik setelah ada pemenang
+    IDLE_TIMEOUT, RESET_DELAY = 15, 10
+    # Jumlah delta berbeda (per nilai `since`) yang disimpan untuk satu versi room
+    STATE_CACHE_SIZE = 32
+
+    def __init__(self, room_id, versions, on_finished=None, match_log=None):
+        self.id = room_id
+        # Counter versi dipakai bersama semua room, sehingga versi klien dari room lama selalu
+        # lebih kecil dari created_version room barunya
+        self.versions = versions
+        self.created_version = next(versions)
+        # Versi perubahan terakhir di room ini; hanya naik lewat bump()
+        self.version = self.created_version
+        self.version_lock = threading.Lock()
+        # Sama seperti sebelumnya: self.players diganti (copy-on-write), tidak diubah di tempat
+        self.players = {}
+        self.game_state = {'game_started': False, 'winner': None, 'game_over_time': None}
+        self.state_version = self.created_version
+        self.removed = deque()
+        self.removed_floor = self.created_version
+        # Simulasi otoritatif, dibuat saat semua pemain ready
+        self.sim, self.sim_start, self.pending_inputs = None, None, {}
+        self.lock = threading.RLock()
+        # Dipanggil sekali dengan room ini saat pemenang ditentukan (penjadwalan reset)
+        self.on_finished = on_finished
+        # MatchLogWriter tujuan rekaman match (None: tidak direkam) dan perekam match yang sedang berjalan
+        self.match_log, self.recording = match_log, None
+        # (versi, {kunci since: entry}): state /gamestate yang sudah dibangun untuk versi room ini, beserta
+        # hasil encode-nya. Diganti utuh saat versi berubah sehingga pembaca tidak perlu lock.
+        self.state_cache = (None, {})
+        self.logger = logging.getLogger(__name__)
+
+    def bump(self):
+        """Mengambil versi baru untuk sebuah perubahan di room ini."""
+        with self.version_lock:
+            self.version = next(self.versions)
+            return self.version
+
+    def is_open(self):
+        return not self.game_state['game_started'] and len(self.players) < self.MAX_PLAYERS
+
+    def add_player(self, player_id, token):
+        with self.lock:
+            if not self.is_open():
+                return False
+            players = dict(self.players)
+            players[player_id] = PlayerRecord(self.bump(), token, state='waiting', score=0)
+            self.players = players
+            return True
+
+    def remove_players(self, player_ids):
+        with self.lock:
+            self.players = {pid: p for pid, p in self.players.items() if pid not in player_ids}
+            for pid in player_ids:
+                self.removed.append((self.bump(), pid))
+            while len(self.removed) > self.MAX_TOMBSTONES:
+                self.removed_floor = self.removed.popleft()[0]
+
+    def check_token(self, player_id, token):
+        """True jika `token` cocok dengan token pemain ini (atau pemain sudah tidak ada di room)."""
+        record = self.players.get(player_id)
+        if record is None:
+            return True
+        return isinstance(token, str) and hmac.compare_digest(token.encode('utf-8'), record.token.encode('ascii'))
+
+    def set_player_ready(self, player_id):
+        with self.lock:
+            players = self.players
+            if player_id in players:
+                players[player_id].update({'state': 'ready'}, self.bump)
+                self.maybe_start()
+
+    def maybe_start(self):
+        """Memulai match jika pemain di lobby cukup dan semuanya sudah siap. Dipanggil setelah
+        pemain siap dan setelah pemain dibuang, karena yang dibuang bisa jadi satu-satunya yang belum siap."""
+        with self.lock:
+            players = self.players
+            if (not self.game_state['game_started'] and len(players) >= self.MIN_PLAYERS
+                    and all(p.get('state') == 'ready' for p in players.values())):
+                self.start_match()
+
+    def start_match(self):
+        seed = random.SystemRandom().getrandbits(32)
+        self.game_state['game_started'] = True
+        self.game_state['seed'] = seed
+        self.sim = sim.MatchSim(seed, list(self.players))
+        self.sim_start = time.monotonic()
+        # Dibatasi: step menerapkan paling banyak satu input per tick, jadi klien yang mengirim lebih
+        # cepat dari TICK_RATE membuang input tertuanya, bukan menumpuk antrian yang makin tertinggal
+        self.pending_inputs = {pid: deque(maxlen=self.MAX_INPUT_LEAD) for pid in self.players}
+        if self.match_log: self.recording = MatchRecording(self.match_log, seed, list(self.players))
+        self.state_version = self.bump()
+        for p in self.players.values(): p.update({'state': 'playing'}, self.bump)
+        self.logger.info(f"Room {self.id}: game is starting with {len(self.players)} players!")
+
+    def submit_input(self, player_id, tick, jump, duck):
+        """Menyimpan tombol yang ditekan pemain mulai tick tertentu. Input yang terlambat
+        diterapkan mulai tick simulasi saat ini (lihat step); klien tidak pernah mengirim posisi atau skor."""
+        record = self.players.get(player_id)
+        if record: record.last_seen = time.monotonic()
+        with self.lock:
+            if self.sim and player_id in self.pending_inputs:
+                tick = min(max(tick, self.sim.tick), self.sim.tick + self.MAX_INPUT_LEAD)
+                queue, buttons = self.pending_inputs[player_id], (bool(jump), bool(duck))
+                if not queue or queue[-1][1:] != buttons:
+                    # Tombol yang sama dengan input terakhir di antrian tidak mengubah apa-apa
+                    queue.append((tick,) + buttons)
+
+    def step(self, now):
+        """Memajukan simulasi sampai tick yang sesuai jam dinding (dikurangi INPUT_DELAY)."""
+        with self.lock:
+            if not self.sim or self.game_state['winner']:
+                return
+            match = self.sim
+            for pid in [pid for pid in match.players if pid not in self.players]:
+                # Pemain yang dibuang karena tidak aktif keluar dari simulasi
+                del match.players[pid]; self.pending_inputs.pop(pid, None)
+            target = int((now - self.sim_start) * sim.TICK_RATE) - self.INPUT_DELAY
+            while match.tick < target and any(p.alive for p in match.players.values()):
+                for pid, queue in self.pending_inputs.items():
+                    # Paling banyak satu perubahan per tick: input terlambat yang menumpuk (mis. tekan
+                    # lalu lepas) bergeser ke tick berikutnya, bukan saling menimpa sehingga lompatan hilang
+                    if queue and queue[0][0] <= match.tick:
+                        match.inputs[pid] = queue.popleft()[1:]
+                crashed = match.step()
+                if self.recording: self.recording.record_tick(match)
+                for pid in crashed:
+                    self.set_player_game_over(pid, match.players[pid].score)
+            for pid, p in match.players.items():
+                fields = {'x': p.x, 'y': p.y, 'is_jumping': p.is_jumping, 'is_ducking': p.is_ducking}
+                if p.alive and match.tick % self.SCORE_SYNC_TICKS == 0: fields['score'] = p.score
+                self.players[pid].update(fields, self.bump)
+            self.decide_winner()
+
+    def set_player_game_over(self, player_id, score):
+        with self.lock:
+            players = self.players
+            if player_id in players and players[player_id].get('state') == 'playing':
+                players[player_id].update({'state': 'game_over', 'score': score}, self.bump)
+
+    def decide_winner(self):
+        """Menentukan pemenang (skor simulasi tertinggi) setelah tidak ada lagi pemain yang hidup."""
+        with self.lock:
+            snapshots = {pid: p.snapshot() for pid, p in self.players.items()}
+            if self.game_state['winner'] or not snapshots or any(p.get('state') == 'playing' for p in snapshots.values()):
+                return
+            winner_id = max(snapshots, key=lambda pid: snapshots[pid].get('score', 0))
+            self.game_state['winner'] = {'id': winner_id, 'score': snapshots[winner_id]['score']}
+            self.game_state['game_over_time'] = time.monotonic()
+            self.state_version = self.bump()
+            if self.recording:
+                self.recording.finish(self.sim.tick, {pid: p.get('score', 0) for pid, p in snapshots.items()}, winner_id)
+        if self.on_finished: self.on_finished(self)
+
+    def idle_deadline(self, player_id):
+        """Kapan pemain ini dianggap tidak aktif, atau None jika sudah tidak ada di room."""
+        record = self.players.get(player_id)
+        return record.last_seen + self.IDLE_TIMEOUT if record else None
+
+    def since_key(self, since, version):
+        """Klien dengan `since` berbeda bisa menerima state yang sama persis: semua yang tertinggal
+        melewati riwayat penghapusan menerima snapshot penuh, yang sudah up to date menerima delta kosong."""
+        if since < self.removed_floor: return 'full'
+        return since if since < version else 'current'
+
+    def cached_game_state(self, player_id, since):
+        """Seperti get_game_state, tetapi state untuk versi room saat ini dibangun sekali dan dipakai
+        bersama semua peminta dengan `since` yang setara. Mengembalikan (state, entry); `entry` adalah
+        dict bersama tempat pemanggil menyimpan hasil encode state tersebut. State tidak boleh diubah."""
+        version, cache = self.state_cache
+        if version == self.version:
+            entry = cache.get(self.since_key(since, version))
+            if entry is not None:
+                record = self.players.get(player_id)
+                if record: record.last_seen = time.monotonic()
+                return entry['state'], entry
+        state = self.get_game_state(player_id, since)
+        entry = {'state': state}
+        with self.lock:
+            version, cache = self.state_cache
+            if version is None or state['version'] > version:
+                version, cache = state['version'], {}
+                self.state_cache = (version, cache)
+            if version == state['version'] and len(cache) < self.STATE_CACHE_SIZE:
+                entry = cache.setdefault(self.since_key(since, version), entry)
+        return entry['state'], entry
+
+    def get_game_state(self, player_id, since):
+        """Mengembalikan delta sejak versi `since`: hanya pemain yang berubah dan yang dihapus;
+        transisi start/winner hanya disertakan jika berubah. Snapshot penuh dikirim jika riwayat
+        penghapusan tidak lagi mencakup `since` (atau klien baru/berasal dari room lain).
+        Pembuangan pemain dan reset room dikerjakan DeadlineScheduler, bukan di sini."""
+        record = self.players.get(player_id)
+        if record: record.last_seen = time.monotonic()
+        with self.lock:
+            # Versi dibaca sebelum record: penulis mengambil versinya sambil memegang lock record,
+            # jadi perubahan bernomor <= version pasti terlihat saat record dibaca di bawah ini
+            version = self.version
+            full = since < self.removed_floor
+            if full:
+                players = {pid: p.snapshot() for pid, p in self.players.items()}
+                removed = []
+            else:
+                players = {pid: p.snapshot() for pid, p in self.players.items() if p.version > since}
+                removed = [pid for v, pid in self.removed if v > since]
+            state = {'room_id': self.id, 'version': version, 'full': full, 'players': players, 'removed': removed}
+            if full or self.state_version > since:
+                state['game_started'] = self.game_state['game_started']
+                state['seed'] = self.game_state.get('seed')
+                state['winner'] = self.game_state.get('winner')
+            return state
+
+class HttpServer:
+    # Batas header yang disimpan per detik (variasi Content-Length di endpoint panas)
+    HEAD_CACHE_SIZE = 256
+    # Jumlah baris maksimum yang dikembalikan /leaderboard
+    MAX_LEADERBOARD_LIMIT = 100
+    # Label endpoint di /metrics; path lain dihitung sebagai 'other'
+    ENDPOINTS = ('/register', '/ready', '/input', '/gamestate', '/stream', '/leaderboard', '/metrics', '/admin/profile')
+
+    def __init__(self):
+        self.rooms = {}
+        # Indeks player_id -> Room agar setiap request menemukan room-nya dalam O(1)
+        self.player_rooms = {}
+        # Antrian matchmaking: room yang masih menerima pemain, yang terlama di depan
+        self.open_rooms = deque()
+        self.player_ids = itertools.count(1)
+        self.room_ids = itertools.count(1)
+        # Id pemain mulai dari 1 lagi setiap server start; sesi membedakannya di log match dan leaderboard
+        self.session = random.getrandbits(32)
+        # Mode multi-proses: indeks worker ini dan port privat semua worker (lihat configure_worker)
+        self.worker_index, self.worker_ports = 0, None
+        # Indeks worker yang sedang mengisi room baru (multiprocessing.Value bersama) dan room-nya
+        self.matchmaker, self.matchmaking_room = None, None
+        # Versi state monoton untuk seluruh server (next() pada itertools.count atomic di CPython)
+        self.versions = itertools.count(1)
+        # Lock global hanya untuk indeks room; state game dikunci per room
+        self.lock = threading.Lock()
+        # Deadline cek idle pemain dan reset room yang sudah selesai
+        self.housekeeping = DeadlineScheduler()
+        self.start_time = time.time()
+        self.metrics = Metrics(self.ENDPOINTS)
+        self.metrics.gauge('dinorun_rooms', 'Rooms in memory', lambda: len(self.rooms))
+        self.metrics.gauge('dinorun_players', 'Players by state', self.players_by_state, label='state')
+        # Endpoint /admin/* hanya aktif jika ADMIN_TOKEN di-set; token dikirim di header X-Admin-Token
+        self.admin_token = os.getenv('ADMIN_TOKEN')
+        # Rekaman match (MATCH_LOG kosong mematikan rekaman); writer dibuat oleh start_match_log()
+        self.match_log_path = os.getenv('MATCH_LOG', DEFAULT_MATCH_LOG)
+        self.match_log = None
+        # Leaderboard dihitung dari log match (bersama semua worker), bukan dari memori proses ini
+        self.leaderboard = Leaderboard(self.match_log_path) if self.match_log_path else None
+        # (detik, string Date) dan (string Date, {kunci: header}); keduanya berlaku satu detik
+        self.date_cache = (None, None)
+        self.head_cache = (None, {})
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        self.logger = logging.getLogger(__name__)
+
+    # --- FUNGSI LOGIKA GAME ---
+    def reset_game(self, room):
+        """Menghapus room yang sudah selesai beserta semua pemainnya."""
+        with self.lock:
+            if self.rooms.pop(room.id, None) is None:
+                return
+            for pid in room.players:
+                if self.player_rooms.get(pid) is room: del self.player_rooms[pid]
+        self.logger.info(f"Room {room.id} reset")
+
+    def register_new_player(self):
+        with self.lock:
+            player_id = str(next(self.player_ids))
+            # Id pemain berurutan dan mudah ditebak; token acak ini yang membuktikan pemiliknya
+            token = '%016x' % secrets.randbits(64)
+            while True:
+                while self.open_rooms and not self.open_rooms[0].is_open():
+                    self.open_rooms.popleft()
+                if not self.open_rooms:
+                    room = Room(str(next(self.room_ids)), self.versions, self.schedule_reset, self.match_log)
+                    self.rooms[room.id] = room
+                    self.open_rooms.append(room)
+                room = self.open_rooms[0]
+                if room.add_player(player_id, token):
+                    break
+            self.player_rooms[player_id] = room
+            self.matchmaking_room = room
+        self.housekeeping.schedule(room.idle_deadline(player_id), self.expire_player, room, player_id)
+        response = {'status': 'OK', 'player_id': player_id, 'token': token, 'room_id': room.id}
+        if self.worker_ports:
+            # Request berikutnya dikirim langsung ke worker pemilik room lewat port privatnya
+            response['port'] = self.worker_ports[self.worker_index]
+        return response
+
+    def configure_worker(self, index, ports, matchmaker=None, session=None):
+        """Menjadikan instance ini worker ke-`index` dari len(ports) proses. Id pemain dan room
+        dibuat kongruen dengan index (modulo jumlah worker) sehingga id saja cukup untuk
+        menentukan proses pemilik room. `matchmaker` (multiprocessing.Value) adalah satu-satunya
+        state bersama: hanya worker yang ditunjuknya menerima /register, agar pemain yang datang
+        berdekatan masuk ke room yang sama walaupun koneksinya dibagi ke worker berbeda. Semua worker
+        memakai `session` yang sama karena id pemain unik di seluruh worker."""
+        self.worker_index, self.worker_ports, self.matchmaker = index, list(ports), matchmaker
+        if session is not None: self.session = session
+        self.player_ids = itertools.count(index + 1, len(ports))
+        self.room_ids = itertools.count(index + 1, len(ports))
+
+    def matchmaker_port(self):
+        """Port worker yang sedang menerima /register jika bukan worker ini; None jika milik sendiri.
+        Setelah room yang sedang diisi mulai bermain atau penuh, giliran pindah ke worker berikutnya."""
+        if self.matchmaker is None:
+            return None
+        with self.matchmaker.get_lock():
+            current = self.matchmaker.value
+            room = self.matchmaking_room
+            if current == self.worker_index and room is not None and not (room.is_open() and room.id in self.rooms):
+                self.matchmaking_room = None
+                current = self.matchmaker.value = (current + 1) % len(self.worker_ports)
+        return self.worker_ports[current] if current != self.worker_index else None
+
+    def owner_port(self, player_id):
+        """Port privat worker pemilik player_id jika bukan worker ini; None jika milik sendiri."""
+        if not self.worker_ports or not player_id or not str(player_id).isdigit():
+            return None
+        owner = (int(player_id) - 1) % len(self.worker_ports)
+        return self.worker_ports[owner] if owner != self.worker_index else None
+
+    def players_by_state(self):
+        """Jumlah pemain per state untuk gauge /metrics (dihitung saat scrape)."""
+        counts = dict.fromkeys(('waiting', 'ready', 'playing', 'game_over'), 0)
+        for room in list(self.rooms.values()):
+            for record in room.players.values():
+                state = record.get('state')
+                counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def set_player_ready(self, player_id):
+        room = self.player_rooms.get(player_id)
+        if room: room.set_player_ready(player_id)
+        return {'status': 'OK'}
+
+    def submit_input(self, data):
+        player_id, tick = data.get('player_id'), data.get('tick', 0)
+        if not isinstance(tick, int) or isinstance(tick, bool):
+            raise ValueError('tick must be an integer')
+        room = self.player_rooms.get(player_id)
+        if room: room.submit_input(player_id, tick, data.get('jump'), data.get('duck'))
+        return {'status': 'OK'}
+
+    def start_simulation(self, tick_rate=sim.TICK_RATE):
+        """Menjalankan thread simulasi timestep tetap untuk semua room yang sedang bermain."""
+        thread = threading.Thread(target=self.simulate, args=(tick_rate,), name='match-simulation', daemon=True)
+        thread.start()
+
+    def simulate(self, tick_rate):
+        interval = 1.0 / tick_rate
+        next_tick = time.monotonic()
+        while True:
+            now = time.monotonic()
+            for room in list(self.rooms.values()):
+                try:
+                    room.step(now)
+                except Exception as e:
+                    self.logger.error(f"Simulation error in room {room.id}: {e}")
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def start_housekeeping(self):
+        """Menjalankan thread DeadlineScheduler untuk cek idle pemain dan reset room."""
+        self.housekeeping.start()
+
+    def start_match_log(self):
+        """Mulai merekam match baru di akhir log yang sudah ada. Di mode multi-proses record terpotong
+        sudah dibuang oleh proses induk sebelum fork (server_multiprocess.prepare_match_log)."""
+        if not self.match_log_path:
+            return
+        if not self.worker_ports:
+            self.repair_match_log(self.match_log_path)
+        self.match_log = MatchLogWriter(self.match_log_path, self.session)
+        self.match_log.start()
+
+    def repair_match_log(self, path):
+        count, dropped = repair_log(path)
+        if dropped:
+            self.logger.warning(f"Truncated {dropped} bytes of incomplete records from {path}")
+        self.logger.info(f"{count} matches already recorded in {path}")
+
+    def stop_match_log(self):
+        if self.match_log: self.match_log.stop()
+
+    def schedule_reset(self, room):
+        self.housekeeping.schedule(room.game_state['game_over_time'] + Room.RESET_DELAY, self.reset_game, room)
+
+    def expire_player(self, room, player_id):
+        """Task housekeeping: membuang pemain yang tidak aktif selama IDLE_TIMEOUT. Pemain yang
+        masih aktif dijadwalkan ulang ke deadline barunya."""
+        if self.player_rooms.get(player_id) is not room:
+            # Room sudah di-reset (reset_game tidak menghapus task di heap) atau pemain sudah dibuang
+            return None
+        deadline = room.idle_deadline(player_id)
+        if deadline is None:
+            return None
+        if deadline > time.monotonic():
+            return deadline
+        room.remove_players({player_id})
+        room.maybe_start()
+        with self.lock:
+            if self.player_rooms.get(player_id) is room: del self.player_rooms[player_id]
+            if not room.players:
+                # Room kosong juga dikeluarkan dari antrian matchmaking agar tidak menerima pemain baru
+                self.rooms.pop(room.id, None)
+                if room in self.open_rooms: self.open_rooms.remove(room)
+        self.logger.info(f"Room {room.id}: player {player_id} removed after {Room.IDLE_TIMEOUT}s of inactivity")
+        return None
+
+    def get_game_state(self, player_id, since=0):
+        room = self.player_rooms.get(player_id)
+        if not room:
+            return {'room_id': None, 'version': next(self.versions), 'full': True, 'players': {}, 'removed': [],
+                    'game_started': False, 'seed': None, 'winner': None}
+        return room.get_game_state(player_id, since)
+
+    def encoded_game_state(self, player_id, since, binary):
+        """Mengembalikan (state, body bytes JSON/biner). Body di-encode sekali per versi room dan
+        delta, lalu dipakai bersama oleh semua request /gamestate dan klien /stream yang setara."""
+        room = self.player_rooms.get(player_id)
+        if not room:
+            state = self.get_game_state(player_id, since)
+            return state, wire.encode_state(state) if binary else json.dumps(state).encode('utf-8')
+        state, entry = room.cached_game_state(player_id, since)
+        body = entry.get(binary)
+        if body is None:
+            body = entry[binary] = wire.encode_state(state) if binary else json.dumps(state).encode('utf-8')
+        return state, body
+
+    # --- FUNGSI HTTP DARI PROGJAR5 ---
+    def http_date(self):
+        """Nilai header Date, diformat paling banyak sekali per detik."""
+        now = int(time.time())
+        second, tanggal = self.date_cache
+        if second != now:
+            tanggal = datetime.fromtimestamp(now).strftime('%c')
+            self.date_cache = (now, tanggal)
+        return tanggal
+
+    def response(self, kode=200, message='OK', body=None, headers=None):
+        if headers is None: headers = {}
+        
+        body_bytes = b''
+        if isinstance(body, bytes):
+            # Body yang sudah di-encode (format biner dinorun_wire, kecuali Content-Type sudah diisi)
+            body_bytes = body
+            headers.setdefault('Content-Type', wire.CONTENT_TYPE)
+        elif body:
+            body_bytes = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        
+        headers['Content-Length'] = str(len(body_bytes))
+        return self.response_head(kode, message, headers) + body_bytes
+
+    def response_head(self, kode, message, headers):
+        """Header response lengkap. Kombinasi status/Content-Type/Content-Length/Connection di endpoint
+        panas hanya sedikit, jadi header yang sudah dirakit disimpan sampai Date berganti detik."""
+        tanggal = self.http_date()
+        key = (kode, message, tuple(headers.items()))
+        cached_date, heads = self.head_cache
+        if cached_date != tanggal:
+            heads = {}
+            self.head_cache = (tanggal, heads)
+        head = heads.get(key)
+        if head is None:
+            lines = [f"HTTP/1.1 {kode} {message}", f"Date: {tanggal}", "Server: DinoRunServer/1.0"]
+            lines.extend(f"{k}: {v}" for k, v in headers.items())
+            lines.extend(('', ''))
+            head = '\r\n'.join(lines).encode('utf-8')
+            if len(heads) < self.HEAD_CACHE_SIZE: heads[key] = head
+        return head
+
+    def stream_response(self):
+        """Header untuk stream Server-Sent Events; body mengalir sampai koneksi ditutup."""
+        return self.response_head(200, 'OK', {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache',
+                                              'Transfer-Encoding': 'chunked', 'Connection': 'keep-alive'})
+
+    def stream_request(self, request):
+        """Jika request adalah GET /stream yang valid, mengembalikan (player_id, since); selain itu None.
+        Koneksi stream diserahkan ke StateBroadcaster, bukan dijawab oleh proses(). Stream yang
+        ditolak (pemain tidak dikenal, `since` tidak valid, worker lain) dijawab route() seperti biasa."""
+        if request.method != 'GET' or request.path != '/stream':
+            return None
+        player_id = request.query.get('player_id')
+        if self.owner_port(player_id) or player_id not in self.player_rooms:
+            return None
+        try:
+            return player_id, int(request.query.get('since', 0))
+        except ValueError:
+            return None
+
+    def error_response(self, error):
+        """Response untuk ParseError dari RequestParser; koneksi selalu ditutup sesudahnya."""
+        return self.response(error.status, error.reason, {'error': str(error)}, {'Connection': 'close'})
+
+    # --- INI ADALAH BAGIAN UTAMA: API ROUTER ---
+    def proses(self, request):
+        """Memproses satu Request hasil RequestParser (atau bytes request lengkap) dan mengembalikan response bytes."""
+        if not hasattr(request, 'method'):
+            try:
+                request = parse_request(request)
+            except ParseError as e:
+                return self.error_response(e)
+        start = time.perf_counter()
+        profile = self.metrics.profiler.sample()
+        # Header Connection menentukan apakah socket tetap dipakai untuk request berikutnya
+        headers = {'Connection': 'keep-alive' if request.keep_alive else 'close'}
+        try:
+            kode, message, response_body, *content_type = self.route(request)
+            if content_type: headers['Content-Type'] = content_type[0]
+        except (ValueError, struct.error) as e:
+            # Body JSON/biner atau query parameter yang tidak valid
+            kode, message, response_body = 400, 'Bad Request', {'error': str(e)}
+        except Exception as e:
+            self.logger.error(f"Error processing request: {e}")
+            kode, message, response_body = 500, 'Internal Server Error', {'error': str(e)}
+        response = self.response(kode, message, response_body, headers)
+        if profile: self.metrics.profiler.finish(profile)
+        self.metrics.observe(request.path, kode, time.perf_counter() - start)
+        return response
+
+    def route(self, request):
+        method, path, body, request_headers = request.method, request.path, request.body, request.headers
+        # Klien yang mengirim Accept: application/x-dinorun menerima response biner di endpoint panas
+        binary = wire.CONTENT_TYPE in request_headers.get('accept', '')
+
+        # Ekstrak body untuk POST request (JSON, atau struct biner untuk /input)
+        body_dict = {}
+        if method == 'POST' and body:
+            if request_headers.get('content-type') == wire.CONTENT_TYPE:
+                if path != '/input':
+                    return 415, 'Unsupported Media Type', {'error': 'Binary body only supported for /input'}
+                body_dict = wire.decode_input(body)
+            else:
+                body_dict = json.loads(body)
+                if not isinstance(body_dict, dict):
+                    raise ValueError('JSON body must be an object')
+            if not isinstance(body_dict.get('player_id', ''), str):
+                raise ValueError('player_id must be a string')
+
+        # Mode multi-proses: pemain yang salah masuk worker diberi tahu port worker pemilik room-nya
+        port = self.owner_port(request.query.get('player_id') or body_dict.get('player_id'))
+        if port:
+            return 421, 'Misdirected Request', {'error': 'Player belongs to another worker', 'port': port}
+
+        # Routing berdasarkan path dan method
+        if method == 'POST' and path == '/register':
+            port = self.matchmaker_port()
+            if port:
+                return 421, 'Misdirected Request', {'error': 'Matchmaking is on another worker', 'port': port}
+            return 200, 'OK', self.register_new_player()
+
+        if method == 'POST' and path in ('/ready', '/input'):
+            # Perintah yang mengubah state pemain hanya diterima dari pemilik token-nya
+            player_id = body_dict.get('player_id')
+            room = self.player_rooms.get(player_id)
+            if room and not room.check_token(player_id, body_dict.get('token')):
+                return 403, 'Forbidden', {'error': 'Invalid player token'}
+
+        if method == 'POST' and path == '/ready':
+            player_id = body_dict.get('player_id')
+            return 200, 'OK', self.set_player_ready(player_id)
+
+        if method == 'POST' and path == '/input':
+            response_body = self.submit_input(body_dict)
+            return 200, 'OK', b'' if binary else response_body
+
+        if method == 'GET' and path == '/gamestate':
+            # Ekstrak player_id dan versi terakhir yang dimiliki klien dari query parameter
+            player_id = request.query.get('player_id')
+            since = int(request.query.get('since', 0))
+            _, response_body = self.encoded_game_state(player_id, since, binary)
+            return 200, 'OK', response_body, wire.CONTENT_TYPE if binary else 'application/json'
+
+        if method == 'GET' and path == '/stream':
+            # Hanya sampai di sini jika stream_request menolak request-nya
+            if not request.query.get('player_id'):
+                return 400, 'Bad Request', {'error': 'Missing player_id'}
+            int(request.query.get('since', 0))
+            return 404, 'Not Found', {'error': 'Unknown player'}
+
+        if method == 'GET' and path == '/leaderboard':
+            if self.leaderboard is None:
+                return 404, 'Not Found', {'error': 'Match log is disabled (MATCH_LOG)'}
+            limit = int(request.query.get('limit', 10))
+            if limit < 1:
+                raise ValueError('limit must be a positive integer')
+            limit = min(limit, self.MAX_LEADERBOARD_LIMIT)
+            self.leaderboard.refresh()
+            return 200, 'OK', {'players': self.leaderboard.top(limit)}
+
+        if method == 'GET' and path == '/metrics':
+            return 200, 'OK', self.metrics.render(), METRICS_CONTENT_TYPE
+
+        if path == '/admin/profile' and self.admin_token:
+            # Dibandingkan sebagai bytes: compare_digest menolak str non-ASCII dengan TypeError (500)
+            supplied = request_headers.get('x-admin-token', '').encode('latin-1')
+            if not hmac.compare_digest(supplied, self.admin_token.encode()):
+                return 403, 'Forbidden', {'error': 'Invalid admin token'}
+            if method == 'POST':
+                # Mulai jendela profiling: satu dari setiap `every` request selama `seconds` detik
+                seconds = float(request.query.get('seconds', 30))
+                if not math.isfinite(seconds) or seconds < 0:
+                    # nan lolos dari min() dan membuat jendela profiling tidak pernah berakhir
+                    raise ValueError('seconds must be a finite, non-negative number')
+                seconds = min(seconds, 600.0)
+                every = int(request.query.get('every', 10))
+                self.metrics.profiler.start(seconds, every)
+                return 200, 'OK', {'status': 'OK', 'seconds': seconds, 'every': every}
+            if method == 'GET':
+                return 200, 'OK', self.metrics.profiler.report(int(request.query.get('limit', 40))), 'text/plain; charset=utf-8'
+
+        # Jika tidak ada path yang cocok
+        return 404, 'Not Found', {'error': 'Endpoint not found'}
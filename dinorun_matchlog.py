@@ -0,0 +1,319 @@
+# FILE: dinorun_matchlog.py
+# Log match biner append-only. Setiap match yang dimainkan server ditulis sebagai rangkaian record:
+# START (seed + pemain), TICKS (input dan state setiap pemain per tick, dikumpulkan per 90 tick),
+# dan END (skor + pemenang). Penulisan dikumpulkan di memori dan ditulis thread latar, jadi
+# simulasi dan request tidak pernah menunggu disk. Pembaca memakai mmap: daftar match dan
+# leaderboard hanya membaca header record, payload TICKS dilompati.
+#
+# Format record (little-endian): magic u8, tipe u8, panjang payload u16, match id u64, lalu payload.
+#   START  started_at f64, sesi server u32, seed u32, n u8, lalu n x (panjang u8 + id pemain ascii)
+#   TICKS  tick pertama u32, jumlah tick u16, lalu jumlah x n x (flags u8, y i16)
+#   END    jumlah tick u32, indeks pemenang u8 (255 = tidak ada), lalu n x (skor u32, status u8)
+# File dibuka dengan O_APPEND dan setiap batch ditulis dengan satu write(), sehingga beberapa
+# proses worker (server_multiprocess) bisa menulis ke file yang sama. Id pemain mulai dari 1 lagi
+# setiap server start, jadi pemain diidentifikasi dengan (sesi, id pemain).
+
+import logging
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+from collections import deque
+
+# Lokasi log jika MATCH_LOG tidak di-set (relatif ke direktori kerja server)
+DEFAULT_PATH = 'matches.dinolog'
+RECORD_MAGIC = 0xD7
+START, TICKS, END = 1, 2, 3
+RECORD_HEADER = struct.Struct('<BBHQ')
+START_HEAD = struct.Struct('<dIIB')
+TICKS_HEAD = struct.Struct('<IH')
+PLAYER_TICK = struct.Struct('<Bh')
+END_HEAD = struct.Struct('<IB')
+PLAYER_RESULT = struct.Struct('<IB')
+NO_WINNER = 255
+# Flags per pemain per tick: tombol yang dipakai simulasi pada tick itu dan state sesudahnya.
+# PRESENT = 0 berarti pemain sudah keluar dari simulasi (dibuang karena tidak aktif).
+INPUT_JUMP, INPUT_DUCK, ALIVE, JUMPING, DUCKING, PRESENT = 1, 2, 4, 8, 16, 32
+# Status pemain di record END
+FINISHED, LEFT = 0, 1
+
+def encode_record(kind, match_id, payload):
+    return RECORD_HEADER.pack(RECORD_MAGIC, kind, len(payload), match_id) + payload
+
+def decode_start(data, start):
+    """Payload START -> (started_at, sesi, seed, [id pemain])."""
+    started_at, session, seed, count = START_HEAD.unpack_from(data, start)
+    player_ids, pos = [], start + START_HEAD.size
+    for _ in range(count):
+        n = data[pos]
+        player_ids.append(bytes(data[pos + 1:pos + 1 + n]).decode('ascii'))
+        pos += 1 + n
+    return started_at, session, seed, player_ids
+
+def decode_end(data, start, length):
+    """Payload END -> (jumlah tick, indeks pemenang atau NO_WINNER, [(skor, status) per pemain])."""
+    ticks, winner = END_HEAD.unpack_from(data, start)
+    return ticks, winner, list(PLAYER_RESULT.iter_unpack(data[start + END_HEAD.size:start + length]))
+
+class MatchRecording:
+    """Perekam satu match, dipanggil oleh Room dari thread simulasi (di bawah lock room).
+    Urutan pemain mengikuti record START; TICKS ditahan di buffer sampai TICKS_PER_RECORD tick."""
+    TICKS_PER_RECORD = 90
+
+    def __init__(self, writer, seed, player_ids):
+        self.writer = writer
+        self.player_ids = list(player_ids)
+        self.match_id = random.getrandbits(64)
+        self.first_tick, self.count, self.buffer = 0, 0, bytearray()
+        payload = bytearray(START_HEAD.pack(time.time(), writer.session, seed, len(self.player_ids)))
+        for pid in self.player_ids:
+            encoded = str(pid).encode('ascii')
+            payload += bytes((len(encoded),)) + encoded
+        writer.write(encode_record(START, self.match_id, bytes(payload)))
+
+    def record_tick(self, match):
+        """Mencatat tick yang baru saja dijalankan MatchSim.step()."""
+        buffer = self.buffer
+        for pid in self.player_ids:
+            p = match.players.get(pid)
+            if p is None:
+                buffer += PLAYER_TICK.pack(0, 0)
+                continue
+            jump, duck = match.inputs.get(pid, (False, False))
+            flags = (PRESENT | (INPUT_JUMP if jump else 0) | (INPUT_DUCK if duck else 0) | (ALIVE if p.alive else 0)
+                     | (JUMPING if p.is_jumping else 0) | (DUCKING if p.is_ducking else 0))
+            buffer += PLAYER_TICK.pack(flags, round(p.y))
+        self.count += 1
+        if self.count == self.TICKS_PER_RECORD:
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            self.writer.write(encode_record(TICKS, self.match_id, TICKS_HEAD.pack(self.first_tick, self.count) + self.buffer))
+            self.first_tick, self.count, self.buffer = self.first_tick + self.count, 0, bytearray()
+
+    def finish(self, ticks, scores, winner_id):
+        """`scores` berisi skor akhir pemain yang masih ada di room; pemain lain ditandai LEFT."""
+        self.flush()
+        winner = self.player_ids.index(winner_id) if winner_id in self.player_ids else NO_WINNER
+        payload = bytearray(END_HEAD.pack(ticks, winner))
+        for pid in self.player_ids:
+            payload += PLAYER_RESULT.pack(scores[pid], FINISHED) if pid in scores else PLAYER_RESULT.pack(0, LEFT)
+        self.writer.write(encode_record(END, self.match_id, bytes(payload)))
+
+class MatchLogWriter:
+    """Menulis record ke file dari thread latar. `write()` hanya menambahkan ke antrian; thread
+    menulis semua yang terkumpul sekali per FLUSH_INTERVAL (atau lebih cepat jika sudah FLUSH_BYTES).
+    Record yang belum ditulis hilang jika proses mati mendadak (paling banyak ~1 detik).
+    `session` ditulis di setiap record START (lihat HttpServer.session)."""
+    FLUSH_INTERVAL = 1.0
+    FLUSH_BYTES = 64 * 1024
+
+    def __init__(self, path, session=0):
+        self.path = path
+        self.session = session
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.wakeup = threading.Event()
+        self.fd = None
+        self.thread = None
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='match-log', daemon=True)
+        self.thread.start()
+        self.logger.info(f"Recording matches to {self.path}")
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def write(self, data):
+        self.pending.append(data)
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= self.FLUSH_BYTES:
+            self.wakeup.set()
+
+    def run(self):
+        while self.running:
+            self.wakeup.wait(self.FLUSH_INTERVAL)
+            self.wakeup.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        chunks = []
+        while self.pending:
+            chunks.append(self.pending.popleft())
+        self.pending_bytes = 0
+        if not chunks:
+            return
+        try:
+            view = memoryview(b''.join(chunks))
+            while view:
+                view = view[os.write(self.fd, view):]
+        except OSError as e:
+            self.logger.error(f"Failed to write match log {self.path}: {e}")
+
+class MatchInfo:
+    """Ringkasan satu match dari record START/END, beserta posisi record TICKS-nya di file."""
+    __slots__ = ('match_id', 'started_at', 'session', 'seed', 'player_ids', 'ticks', 'scores', 'statuses', 'winner',
+                 'tick_records')
+
+    def __init__(self, match_id, started_at, session, seed, player_ids):
+        self.match_id, self.started_at, self.session, self.seed, self.player_ids = match_id, started_at, session, seed, player_ids
+        self.ticks, self.scores, self.statuses, self.winner = None, None, None, None
+        self.tick_records = []
+
+    @property
+    def finished(self):
+        return self.scores is not None
+
+class MatchLogReader:
+    """Membaca log lewat mmap (snapshot ukuran file saat dibuka), mulai dari `offset` (awal
+    sebuah record). Record terakhir yang terpotong (proses mati atau masih menulis) atau rusak
+    menghentikan pembacaan di record tersebut."""
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self.index = None
+        # Akhir record utuh terakhir, diisi setelah records() selesai membaca seluruh file
+        self.end = None
+
+    def close(self):
+        if self.size: self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self):
+        """Menghasilkan (tipe, match id, offset payload, panjang payload) untuk setiap record utuh."""
+        data, size, offset = self.data, self.size, self.offset
+        while offset + RECORD_HEADER.size <= size:
+            magic, kind, length, match_id = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            if magic != RECORD_MAGIC or start + length > size:
+                break
+            yield kind, match_id, start, length
+            offset = start + length
+        self.end = offset
+
+    def matches(self):
+        """Dict match id -> MatchInfo untuk semua match di log, urut sesuai record START."""
+        if self.index is not None:
+            return self.index
+        data, index = self.data, {}
+        for kind, match_id, start, length in self.records():
+            if kind == START:
+                index[match_id] = MatchInfo(match_id, *decode_start(data, start))
+            elif match_id in index:
+                info = index[match_id]
+                if kind == TICKS:
+                    info.tick_records.append((start, length))
+                elif kind == END:
+                    info.ticks, winner, results = decode_end(data, start, length)
+                    info.scores = [score for score, _ in results]
+                    info.statuses = [status for _, status in results]
+                    info.winner = info.player_ids[winner] if winner != NO_WINNER else None
+        self.index = index
+        return index
+
+    def ticks(self, match_id):
+        """Menghasilkan (tick, [(flags, y) per pemain]) untuk setiap tick match, berurutan."""
+        info = self.matches()[match_id]
+        count = len(info.player_ids)
+        for start, length in info.tick_records:
+            first_tick, tick_count = TICKS_HEAD.unpack_from(self.data, start)
+            body = start + TICKS_HEAD.size
+            players = list(PLAYER_TICK.iter_unpack(self.data[body:body + tick_count * count * PLAYER_TICK.size]))
+            for i in range(tick_count):
+                yield first_tick + i, players[i * count:(i + 1) * count]
+
+def repair_log(path):
+    """Membuang record terakhir yang terpotong (proses mati saat menulis) agar record yang
+    ditambahkan sesudahnya tetap terbaca. Mengembalikan (jumlah match di log, byte yang dibuang).
+    Harus dipanggil sebelum ada proses yang menulis ke file ini (sekali, bukan per worker)."""
+    if not os.path.exists(path):
+        return 0, 0
+    with MatchLogReader(path) as reader:
+        count = len(reader.matches())
+        end, size = reader.end, reader.size
+    if end < size:
+        os.truncate(path, end)
+    return count, size - end
+
+class Leaderboard:
+    """Statistik per pemain (match, menang, skor terbaik) dari match yang selesai, dihitung dari
+    log match. Kuncinya (sesi, id pemain) karena id pemain mulai dari 1 lagi setiap server start.
+    Server memanggil refresh() sebelum menjawab /leaderboard: hanya record yang ditambahkan sejak
+    refresh sebelumnya yang dibaca, dan karena semua worker mode multi-proses menulis ke file yang
+    sama, worker mana pun memberi hasil yang sama (tertinggal paling lama satu flush writer)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.players = {}
+        # Match yang record START-nya sudah dibaca tetapi END-nya belum: match id -> (sesi, id pemain)
+        self.started = {}
+        # Posisi di file sampai mana record sudah dihitung
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def add(self, session, scores, winner_id):
+        """`scores`: id pemain -> skor akhir untuk pemain yang menyelesaikan match."""
+        for pid, score in scores.items():
+            stats = self.players.setdefault((session, pid), [0, 0, 0])
+            stats[0] += 1
+            stats[1] += pid == winner_id
+            stats[2] = max(stats[2], score)
+
+    def load(self, reader):
+        """Menghitung match yang selesai dari record `reader` (mulai reader.offset)."""
+        data = reader.data
+        for kind, match_id, start, length in reader.records():
+            if kind == START:
+                _, session, _, player_ids = decode_start(data, start)
+                self.started[match_id] = (session, player_ids)
+            elif kind == END and match_id in self.started:
+                session, player_ids = self.started.pop(match_id)
+                _, winner, results = decode_end(data, start, length)
+                self.add(session, {pid: score for pid, (score, status) in zip(player_ids, results) if status == FINISHED},
+                         player_ids[winner] if winner != NO_WINNER else None)
+        self.offset = reader.end
+
+    def refresh(self):
+        """Membaca record baru di `path` sejak refresh terakhir."""
+        with self.lock:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                return
+            if size < self.offset:
+                # File dipotong atau diganti: hitung ulang dari awal
+                self.players, self.started, self.offset = {}, {}, 0
+            if size > self.offset:
+                with MatchLogReader(self.path, self.offset) as reader:
+                    self.load(reader)
+
+    def top(self, limit=10):
+        with self.lock:
+            ranked = sorted(self.players.items(), key=lambda item: (-item[1][1], -item[1][2], item[0]))[:limit]
+        return [{'session': '%08x' % session, 'player_id': pid, 'matches': matches, 'wins': wins, 'best_score': best}
+                for (session, pid), (matches, wins, best) in ranked]
@@ -0,0 +1,177 @@
+# FILE: dinorun_metrics.py
+# Metrik server dalam format teks Prometheus (GET /metrics) dan profiling cProfile tersampel
+# (/admin/profile). Di jalur panas pencatatan hanya beberapa operasi dict pada shard milik thread
+# itu sendiri, tanpa lock; shard dijumlahkan, gauge dihitung, dan teks dirakit saat di-scrape.
+
+import bisect
+import cProfile
+import io
+import pstats
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Batas atas bucket histogram latensi router (detik)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# Nilai yang diubah lewat Metrics.add(): nama -> (tipe, keterangan)
+SERIES = {
+    'dinorun_connections_total': ('counter', 'Accepted client connections'),
+    'dinorun_connections_active': ('gauge', 'Open request/response connections (streams are counted separately)'),
+    'dinorun_bytes_received_total': ('counter', 'Bytes read from client sockets'),
+    'dinorun_bytes_sent_total': ('counter', 'Bytes written to client sockets, including /stream events'),
+}
+
+class MetricsShard:
+    """Counter milik satu thread. Hanya thread pemiliknya yang menulis, jadi pencatatan tidak
+    memerlukan lock; scrape menjumlahkan semua shard."""
+    __slots__ = ('rows', 'values')
+
+    def __init__(self):
+        # endpoint -> [jumlah per bucket latensi..., +Inf, total detik, {kode status: jumlah}]
+        self.rows = {}
+        self.values = dict.fromkeys(SERIES, 0)
+
+class Metrics:
+    """Registry metrik satu proses server. `endpoints` membatasi label endpoint agar path
+    sembarangan dari klien tidak membuat seri baru (semuanya dihitung sebagai 'other')."""
+
+    def __init__(self, endpoints):
+        self.endpoints = frozenset(endpoints)
+        self.local = threading.local()
+        self.shards = []
+        self.lock = threading.Lock()
+        # nama -> (keterangan, fungsi, label); fungsi mengembalikan angka, atau dict nilai label -> angka
+        self.gauges = {}
+        self.profiler = SampledProfiler()
+
+    def shard(self):
+        shard = getattr(self.local, 'shard', None)
+        if shard is None:
+            shard = self.local.shard = MetricsShard()
+            with self.lock:
+                self.shards.append(shard)
+        return shard
+
+    def row(self, shard, endpoint):
+        if endpoint not in self.endpoints: endpoint = 'other'
+        row = shard.rows.get(endpoint)
+        if row is None:
+            row = shard.rows[endpoint] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, {}]
+        return row
+
+    def observe(self, endpoint, code, seconds):
+        shard = self.shard()
+        row = shard.rows.get(endpoint) or self.row(shard, endpoint)
+        row[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        row[-2] += seconds
+        codes = row[-1]
+        codes[code] = codes.get(code, 0) + 1
+
+    def add(self, name, value=1):
+        self.shard().values[name] += value
+
+    def gauge(self, name, help, fn, label=None):
+        """Mendaftarkan gauge yang dibaca saat scrape (panjang antrian, jumlah pemain, ...)."""
+        self.gauges[name] = (help, fn, label)
+
+    def render(self):
+        requests, latency, values = {}, {}, dict.fromkeys(SERIES, 0)
+        with self.lock:
+            shards = list(self.shards)
+        for shard in shards:
+            # Salinan dulu: thread pemilik shard bisa menambah kunci baru saat scrape
+            for endpoint, row in list(shard.rows.items()):
+                total = latency.setdefault(endpoint, [0] * (len(row) - 1))
+                for i, count in enumerate(row[:-1]): total[i] += count
+                for code, count in list(row[-1].items()):
+                    requests[endpoint, code] = requests.get((endpoint, code), 0) + count
+            for name, value in list(shard.values.items()):
+                values[name] += value
+        requests, latency = sorted(requests.items()), sorted(latency.items())
+        lines = ['# HELP dinorun_http_requests_total Requests handled by the router',
+                 '# TYPE dinorun_http_requests_total counter']
+        lines.extend(f'dinorun_http_requests_total{{endpoint="{endpoint}",code="{code}"}} {count}'
+                     for (endpoint, code), count in requests)
+        lines += ['# HELP dinorun_http_request_duration_seconds Router time per request, excluding socket I/O',
+                  '# TYPE dinorun_http_request_duration_seconds histogram']
+        for endpoint, histogram in latency:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram):
+                cumulative += count
+                lines.append(f'dinorun_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'dinorun_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {histogram[-1]:.6f}')
+            lines.append(f'dinorun_http_request_duration_seconds_count{{endpoint="{endpoint}"}} {cumulative}')
+        for name, (kind, help) in SERIES.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}', f'{name} {values[name]}']
+        for name, (help, fn, label) in self.gauges.items():
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+            if label:
+                lines.extend(f'{name}{{{label}="{key}"}} {count}' for key, count in sorted(value.items()))
+            else:
+                lines.append(f'{name} {value}')
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
+
+class SampledProfiler:
+    """cProfile untuk server yang sedang berjalan: selama jendela `seconds`, satu dari setiap
+    `every` request di-profile dan hasilnya digabung. Hanya satu request di-profile pada satu
+    waktu (cProfile tidak bisa aktif bersamaan), sisanya berjalan tanpa overhead."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.busy = threading.Lock()
+        # Batas jendela (time.monotonic), 0 jika tidak aktif
+        self.until = 0.0
+        self.every = 1
+        self.counter = 0
+        self.samples = 0
+        self.stats = None
+
+    def start(self, seconds, every):
+        with self.lock:
+            self.until = time.monotonic() + seconds
+            self.every, self.counter, self.samples, self.stats = max(1, every), 0, 0, None
+
+    def sample(self):
+        """Profile yang sudah aktif jika request ini terpilih, selain itu None."""
+        if not self.until:
+            return None
+        if time.monotonic() > self.until:
+            self.until = 0.0
+            return None
+        self.counter += 1
+        if self.counter % self.every or not self.busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Profiler lain (mis. debugger) sudah aktif di proses ini
+            self.busy.release()
+            return None
+        return profile
+
+    def finish(self, profile):
+        profile.disable()
+        self.busy.release()
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile, stream=io.StringIO())
+            else:
+                self.stats.add(profile)
+            self.samples += 1
+
+    def report(self, limit=40):
+        with self.lock:
+            remaining = max(0.0, self.until - time.monotonic()) if self.until else 0.0
+            out = io.StringIO()
+            out.write(f"samples: {self.samples}, one in {self.every} requests, "
+                      f"{'running, %.1fs left' % remaining if remaining else 'stopped'}\n")
+            if self.stats is not None:
+                self.stats.stream = out
+                self.stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue().encode('utf-8')
@@ -0,0 +1,122 @@
+# FILE: dinorun_parser.py
+# Parser request HTTP/1.1 inkremental berbasis bytes. Data dari socket ditambahkan ke satu
+# bytearray; pencarian akhir header dilanjutkan dari posisi terakhir (bukan dari awal buffer),
+# body dibingkai dengan Content-Length, dan beberapa request pipelined dalam satu recv
+# dikembalikan sekaligus sesuai urutannya.
+
+from urllib.parse import parse_qs
+
+class ParseError(Exception):
+    """Request tidak valid. `status`/`reason` dikirim ke klien lalu koneksi ditutup."""
+    def __init__(self, status, reason, detail):
+        super().__init__(detail)
+        self.status = status
+        self.reason = reason
+
+class Request:
+    __slots__ = ('method', 'target', 'path', 'version', 'headers', 'body', '_query')
+
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        self.target = target
+        self.path, _, query = target.partition('?')
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self._query = query
+
+    @property
+    def query(self):
+        """Query string sebagai dict nama -> nilai pertama, di-parse saat pertama dipakai."""
+        if isinstance(self._query, str):
+            self._query = {k: v[0] for k, v in parse_qs(self._query).items()}
+        return self._query
+
+    @property
+    def keep_alive(self):
+        """HTTP/1.1 persistent secara default, HTTP/1.0 hanya jika meminta 'Connection: keep-alive'."""
+        connection = self.headers.get('connection', '').lower()
+        if 'close' in connection:
+            return False
+        return self.version == 'HTTP/1.1' or 'keep-alive' in connection
+
+class RequestParser:
+    """Satu parser per koneksi. `feed()` menerima bytes dari recv dan mengembalikan daftar
+    Request yang sudah lengkap (bisa kosong jika data belum cukup)."""
+    MAX_HEADER_SIZE = 8 * 1024
+    MAX_BODY_SIZE = 64 * 1024
+
+    def __init__(self):
+        self.buffer = bytearray()
+        # Awal request berikutnya di buffer, dan posisi pencarian '\r\n\r\n' berikutnya
+        self.start = 0
+        self.scan_from = 0
+        # Header yang sudah di-parse sambil menunggu body lengkap: (method, target, version, headers, body_start, length)
+        self.pending = None
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        requests = []
+        while True:
+            if self.pending is None:
+                header_end = buffer.find(b'\r\n\r\n', self.scan_from)
+                if header_end < 0:
+                    if len(buffer) - self.start > self.MAX_HEADER_SIZE:
+                        raise ParseError(431, 'Request Header Fields Too Large', 'header too large')
+                    # Tiga byte terakhir bisa jadi awal '\r\n\r\n' yang terpotong
+                    self.scan_from = max(self.start, len(buffer) - 3)
+                    break
+                if header_end - self.start > self.MAX_HEADER_SIZE:
+                    raise ParseError(431, 'Request Header Fields Too Large', 'header too large')
+                with memoryview(buffer) as view:
+                    head = bytes(view[self.start:header_end])
+                self.pending = self.parse_head(head, header_end + 4)
+            method, target, version, headers, body_start, length = self.pending
+            if len(buffer) < body_start + length:
+                break
+            with memoryview(buffer) as view:
+                body = bytes(view[body_start:body_start + length])
+            requests.append(Request(method, target, version, headers, body))
+            self.pending = None
+            self.start = self.scan_from = body_start + length
+        # Bagian yang sudah dikonsumsi dibuang sekaligus, bukan per request
+        if self.start and (self.start == len(buffer) or self.start > len(buffer) // 2):
+            del buffer[:self.start]
+            if self.pending is not None:
+                method, target, version, headers, body_start, length = self.pending
+                self.pending = (method, target, version, headers, body_start - self.start, length)
+            self.scan_from -= self.start
+            self.start = 0
+        return requests
+
+    def parse_head(self, head, body_start):
+        # Header HTTP adalah latin-1; seluruh header di-decode sekali sehingga karakter tidak terpotong
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise ParseError(400, 'Bad Request', f'malformed request line {lines[0][:64]!r}')
+        method, target, version = parts
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise ParseError(400, 'Bad Request', f'malformed header {line[:64]!r}')
+            headers[name.strip().lower()] = value.strip()
+        if 'transfer-encoding' in headers:
+            raise ParseError(501, 'Not Implemented', 'request bodies must use Content-Length')
+        length = headers.get('content-length', '0')
+        if not (length.isascii() and length.isdigit()):
+            raise ParseError(400, 'Bad Request', f'invalid Content-Length {length[:32]!r}')
+        length = int(length)
+        if length > self.MAX_BODY_SIZE:
+            raise ParseError(413, 'Payload Too Large', f'body of {length} bytes exceeds {self.MAX_BODY_SIZE}')
+        return method, target, version.upper(), headers, body_start, length
+
+def parse_request(data):
+    """Mem-parse satu request lengkap (bytes atau str); untuk alat bantu dan tes manual."""
+    if isinstance(data, str): data = data.encode('utf-8')
+    requests = RequestParser().feed(data)
+    if not requests:
+        raise ParseError(400, 'Bad Request', 'incomplete request')
+    return requests[0]
@@ -0,0 +1,132 @@
+# FILE: dinorun_replay.py
+# Memutar ulang match dari log match (dinorun_matchlog.py). Simulasi bersifat deterministik, jadi
+# replay cukup menjalankan MatchSim dari seed dengan input yang terekam per tick; state terekam
+# dipakai untuk verifikasi. Tampil lewat renderer Game (pygame) atau headless secepat CPU.
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from dinorun_matchlog import MatchLogReader, Leaderboard, DEFAULT_PATH, PRESENT, ALIVE, INPUT_JUMP, INPUT_DUCK
+from dinorun_sim import MatchSim, TICK_RATE
+
+def replay(reader, info, make_player=None, on_tick=None):
+    """Mensimulasikan ulang satu match. `make_player(pid, index)` membuat objek pemain (default
+    PlayerSim); `on_tick(match)` dipanggil setelah setiap tick dan boleh mengembalikan False untuk
+    berhenti. Mengembalikan (MatchSim, jumlah state pemain yang tidak sama dengan rekaman)."""
+    match = MatchSim(info.seed, info.player_ids)
+    if make_player:
+        match.players = {pid: make_player(pid, i) for i, pid in enumerate(info.player_ids)}
+    mismatches = 0
+    for tick, players in reader.ticks(info.match_id):
+        for pid, (flags, _) in zip(info.player_ids, players):
+            if flags & PRESENT:
+                match.inputs[pid] = (bool(flags & INPUT_JUMP), bool(flags & INPUT_DUCK))
+            else:
+                # Pemain yang dibuang server karena tidak aktif keluar dari simulasi sebelum tick ini
+                match.players.pop(pid, None)
+        match.step()
+        for pid, (flags, y) in zip(info.player_ids, players):
+            p = match.players.get(pid)
+            if p is not None and (round(p.y) != y or p.alive != bool(flags & ALIVE)):
+                mismatches += 1
+        if on_tick and on_tick(match) is False:
+            break
+    return match, mismatches
+
+def render(reader, info, speed):
+    """Replay di window pygame memakai PygameRenderer dari dinorun.py; speed 0 = tanpa batas FPS."""
+    import pygame
+    from dinorun import Game, Dinosaur, NullAudio, FPS
+    game = Game(audio=NullAudio(), throttle=speed > 0)
+    game.seed, game.game_started = info.seed, True
+    game.server_players = {pid: {'state': 'playing'} for pid in info.player_ids}
+
+    def make_player(pid, index):
+        return Dinosaur(pid, game.client, is_remote=index > 0)
+
+    def on_tick(match):
+        if game.field is None:
+            game.field = match.field
+            game.local_player = match.players[info.player_ids[0]]
+            game.remote_players = {pid: p for pid, p in match.players.items() if pid != info.player_ids[0]}
+        for pid in info.player_ids:
+            p = match.players.get(pid)
+            if p is None or not p.alive:
+                game.server_players[pid]['state'] = 'game_over'
+                if p is None: game.remote_players.pop(pid, None)
+        for event in game.renderer.events():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return False
+        game.renderer.draw_game(game, not game.local_player.alive)
+        game.wait_frame(FPS * speed)
+
+    match, mismatches = replay(reader, info, make_player, on_tick)
+    if info.winner is not None and game.field is not None:
+        game.winner = {'id': info.winner, 'score': info.scores[info.player_ids.index(info.winner)]}
+        game.renderer.draw_game(game, not game.local_player.alive)
+        time.sleep(3)
+    game.renderer.close()
+    return match, mismatches
+
+def find_match(reader, match_id):
+    matches = reader.matches()
+    if match_id == 'last':
+        if not matches: return None
+        return list(matches.values())[-1]
+    try:
+        return matches.get(int(match_id, 16))
+    except ValueError:
+        return None
+
+def print_matches(reader):
+    print(f"{'match':<18}{'session':<10}{'started':<21}{'ticks':>7}  {'winner':<8}players")
+    for info in reader.matches().values():
+        started = datetime.fromtimestamp(info.started_at).strftime('%Y-%m-%d %H:%M:%S')
+        ticks = info.ticks if info.finished else '-'
+        print(f"{info.match_id:016x}  {info.session:08x}  {started:<21}{ticks:>7}  {str(info.winner or '-'):<8}{', '.join(info.player_ids)}")
+
+def print_leaderboard(reader, limit):
+    leaderboard = Leaderboard()
+    leaderboard.load(reader)
+    print(f"{'session':<10}{'player':<10}{'matches':>9}{'wins':>7}{'best':>8}")
+    for row in leaderboard.top(limit):
+        print(f"{row['session']:<10}{row['player_id']:<10}{row['matches']:>9}{row['wins']:>7}{row['best_score']:>8}")
+
+def main(args):
+    if not os.path.exists(args.log):
+        print(f"Match log {args.log} not found")
+        return 1
+    with MatchLogReader(args.log) as reader:
+        if args.leaderboard:
+            print_leaderboard(reader, args.limit)
+            return 0
+        if not args.match:
+            print_matches(reader)
+            return 0
+        info = find_match(reader, args.match)
+        if info is None:
+            print(f"Match {args.match} not found in {args.log}")
+            return 1
+        started = time.perf_counter()
+        if args.headless:
+            match, mismatches = replay(reader, info)
+        else:
+            match, mismatches = render(reader, info, args.speed)
+        elapsed = time.perf_counter() - started
+        print(f"match {info.match_id:016x}: seed {info.seed}, {match.tick} ticks replayed in {elapsed:.3f}s "
+              f"({match.tick / elapsed if elapsed else 0:.0f} ticks/s, {match.tick / TICK_RATE:.1f}s of play)")
+        print(f"scores: {', '.join(f'P{pid}={p.score}' for pid, p in match.players.items())}; recorded winner: {info.winner}")
+        print("verified: state matches recording" if not mismatches else f"WARNING: {mismatches} player states differ from recording")
+        return 0 if not mismatches else 2
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DinoRun match log viewer and replay")
+    parser.add_argument('log', nargs='?', default=os.getenv('MATCH_LOG') or DEFAULT_PATH)
+    parser.add_argument('--match', help="Id match (hex, lihat daftar) atau 'last'")
+    parser.add_argument('--headless', action='store_true', help="Replay tanpa window, secepat mungkin")
+    parser.add_argument('--speed', type=float, default=1.0, help="Kecepatan replay di window (0 = tanpa batas FPS)")
+    parser.add_argument('--leaderboard', action='store_true')
+    parser.add_argument('--limit', type=int, default=10)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,141 @@
+# FILE: dinorun_sim.py
+# Fisika dan rintangan DinoRun tanpa pygame, dipakai bersama oleh server (simulasi otoritatif)
+# dan klien (prediksi lokal). Semua acak berasal dari RNG ber-seed per room sehingga setiap
+# pemain dan server melihat urutan rintangan yang sama persis untuk setiap tick.
+
+import random
+from array import array
+from collections import namedtuple
+
+WIDTH, HEIGHT = 1000, 600
+GROUND_HEIGHT = HEIGHT - 100
+GRAVITY, JUMP_STRENGTH, OBSTACLE_SPEED, SPAWN_RATE = 0.8, -15, 8, 120
+TICK_RATE = 30  # Satu tick simulasi = satu frame klien pada 30 FPS
+PLAYER_X = 100
+# Jenis rintangan disimpan sebagai kode (indeks tuple ini); ukuran dan posisi y per jenis
+OBSTACLE_TYPES = ('rock', 'pterodactyl')
+OBSTACLE_SIZE = ((40, 40), (60, 30))
+OBSTACLE_Y = (GROUND_HEIGHT - 40, GROUND_HEIGHT - 70)
+
+# Tampilan satu rintangan untuk renderer; simulasi sendiri tidak membuat objek per rintangan
+Obstacle = namedtuple('Obstacle', 'type x y width height')
+
+class ObstacleField:
+    """Aliran rintangan deterministik: seed dan nomor tick yang sama selalu menghasilkan rintangan yang sama.
+
+    Rintangan disimpan sebagai structure-of-arrays di ring buffer (`spawn_x`, `kind`). Semua rintangan
+    muncul di x = WIDTH dan bergerak dengan kecepatan yang sama, sehingga x = spawn_x - scroll dan buffer
+    selalu urut dari yang paling kiri: gerak cukup menambah `scroll`, culling memajukan head (jarak spawn
+    minimal 31 tick * 8 px jauh melebihi selisih lebar), dan cek tabrakan berhenti di rintangan pertama
+    yang berada di kanan pemain."""
+    INITIAL_CAPACITY = 8  # Pangkat dua; dengan konstanta sekarang paling banyak ~5 rintangan hidup
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.spawn_timer, self.scroll = 0, 0
+        self.capacity, self.head, self.count = self.INITIAL_CAPACITY, 0, 0
+        self.spawn_x = array('l', [0]) * self.capacity
+        self.kind = array('B', [0]) * self.capacity
+
+    def step(self, tick):
+        if self.spawn_timer <= 0:
+            self.push(self.rng.choice((0, 1)))
+            # Kesulitan naik seiring tick (dulu: skor lokal), sama untuk semua pemain di room
+            self.spawn_timer = self.rng.randint(max(30, 120 - tick // 10), SPAWN_RATE)
+        else: self.spawn_timer -= 1
+        self.scroll += OBSTACLE_SPEED
+        mask = self.capacity - 1
+        while self.count and self.spawn_x[self.head] - self.scroll + OBSTACLE_SIZE[self.kind[self.head]][0] < 0:
+            self.head, self.count = (self.head + 1) & mask, self.count - 1
+
+    def push(self, kind):
+        if self.count == self.capacity: self.grow()
+        i = (self.head + self.count) & (self.capacity - 1)
+        self.spawn_x[i], self.kind[i] = WIDTH + self.scroll, kind
+        self.count += 1
+
+    def grow(self):
+        order = [(self.head + k) & (self.capacity - 1) for k in range(self.count)]
+        self.spawn_x = array('l', [self.spawn_x[i] for i in order]) + array('l', [0]) * self.capacity
+        self.kind = array('B', [self.kind[i] for i in order]) + array('B', [0]) * self.capacity
+        self.head, self.capacity = 0, self.capacity * 2
+
+    def collides(self, rect):
+        x, y, w, h = rect
+        mask, scroll, right = self.capacity - 1, self.scroll, x + w
+        for k in range(self.count):
+            i = (self.head + k) & mask
+            ox = self.spawn_x[i] - scroll
+            if ox >= right: return False  # Sisanya lebih jauh ke kanan
+            kind = self.kind[i]; ow, oh = OBSTACLE_SIZE[kind]; oy = OBSTACLE_Y[kind]
+            if x < ox + ow and y < oy + oh and oy < y + h: return True
+        return False
+
+    def collisions(self, rects):
+        """Cek tabrakan banyak pemain sekaligus: rintangan yang bersinggungan secara horizontal
+        dicari sekali, lalu tiap pemain hanya dibandingkan dengan kandidat itu."""
+        if not rects or not self.count: return [False] * len(rects)
+        left, right = min(r[0] for r in rects), max(r[0] + r[2] for r in rects)
+        mask, scroll, candidates = self.capacity - 1, self.scroll, []
+        for k in range(self.count):
+            i = (self.head + k) & mask
+            ox = self.spawn_x[i] - scroll
+            if ox >= right: break
+            kind = self.kind[i]; ow, oh = OBSTACLE_SIZE[kind]
+            if left < ox + ow: candidates.append((ox, OBSTACLE_Y[kind], ow, oh))
+        if not candidates: return [False] * len(rects)
+        return [any(x < ox + ow and ox < x + w and y < oy + oh and oy < y + h for ox, oy, ow, oh in candidates)
+                for x, y, w, h in rects]
+
+    @property
+    def obstacles(self):
+        """Rintangan yang masih hidup, dari yang paling kiri (untuk render)."""
+        mask, result = self.capacity - 1, []
+        for k in range(self.count):
+            i = (self.head + k) & mask; kind = self.kind[i]
+            result.append(Obstacle(OBSTACLE_TYPES[kind], self.spawn_x[i] - self.scroll, OBSTACLE_Y[kind], *OBSTACLE_SIZE[kind]))
+        return result
+
+class PlayerSim:
+    """Fisika satu dinosaurus. Input berupa tombol yang sedang ditekan (jump, duck) per tick."""
+    def __init__(self, x=PLAYER_X):
+        self.x, self.y, self.width, self.height, self.score = x, GROUND_HEIGHT - 60, 50, 60, 0
+        self.vel_y, self.is_jumping, self.is_ducking, self.alive = 0, False, False, True
+    def jump(self):
+        if not self.is_jumping and not self.is_ducking: self.is_jumping, self.vel_y = True, JUMP_STRENGTH
+    def duck(self, is_ducking):
+        if not self.is_jumping:
+            if is_ducking and not self.is_ducking: self.is_ducking, self.height, self.y = True, 30, GROUND_HEIGHT - 30
+            elif not is_ducking and self.is_ducking: self.is_ducking, self.height, self.y = False, 60, GROUND_HEIGHT - 60
+    def apply_input(self, jump, duck):
+        if jump: self.jump()
+        self.duck(duck)
+    def step(self):
+        if self.is_jumping:
+            self.vel_y += GRAVITY; self.y += self.vel_y
+            if self.y >= GROUND_HEIGHT - self.height: self.y, self.is_jumping, self.vel_y = GROUND_HEIGHT - self.height, False, 0
+        self.score += 1
+    def get_rect(self): return (self.x, self.y, self.width, self.height)
+
+class MatchSim:
+    """Simulasi satu match dengan timestep tetap. Urutan per tick sama dengan loop klien:
+    input + fisika pemain, lalu spawn/gerak rintangan, lalu cek tabrakan."""
+    def __init__(self, seed, player_ids):
+        self.seed, self.tick = seed, 0
+        self.field = ObstacleField(seed)
+        self.players = {pid: PlayerSim() for pid in player_ids}
+        # Tombol yang sedang ditekan per pemain; bertahan sampai input berikutnya
+        self.inputs = {pid: (False, False) for pid in player_ids}
+
+    def step(self):
+        """Menjalankan satu tick; mengembalikan id pemain yang tertabrak pada tick ini."""
+        alive = [(pid, p) for pid, p in self.players.items() if p.alive]
+        for pid, p in alive:
+            p.apply_input(*self.inputs[pid]); p.step()
+        self.field.step(self.tick)
+        crashed = []
+        for (pid, p), hit in zip(alive, self.field.collisions([p.get_rect() for _, p in alive])):
+            if hit:
+                p.alive = False; crashed.append(pid)
+        self.tick += 1
+        return crashed
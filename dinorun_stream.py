@@ -0,0 +1,105 @@
+import time
+import logging
+import threading
+
+def chunk(data):
+    """Membungkus satu event sebagai chunk HTTP/1.1 agar klien menerimanya tanpa menunggu buffer penuh."""
+    return b'%x\r\n%s\r\n' % (len(data), data)
+
+class StreamSubscriber:
+    """Satu klien Server-Sent Events. `send` dipanggil dari thread broadcaster dan harus
+    melempar exception jika koneksi sudah tidak bisa ditulisi."""
+    __slots__ = ('player_id', 'since', 'send', 'close', 'last_sent')
+
+    def __init__(self, player_id, since, send, close):
+        self.player_id = player_id
+        self.since = since
+        self.send = send
+        self.close = close
+        self.last_sent = time.monotonic()
+
+class StateBroadcaster:
+    """Mengirim delta /gamestate ke semua klien stream pada tick rate server yang tetap,
+    menggantikan polling per frame. Hanya perubahan yang dikirim; koneksi diam diberi
+    heartbeat agar klien tahu server masih hidup."""
+    HEARTBEAT_INTERVAL = 5.0
+
+    def __init__(self, httpserver, tick_rate=30):
+        self.httpserver = httpserver
+        self.tick_rate = tick_rate
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+        httpserver.metrics.gauge('dinorun_stream_subscribers', 'Open /stream connections', lambda: len(self.subscribers))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='state-broadcaster', daemon=True)
+        self.thread.start()
+        self.logger.info(f"State broadcaster running at {self.tick_rate} Hz")
+
+    def stop(self):
+        self.running = False
+
+    def subscribe(self, player_id, since, send, close):
+        with self.lock:
+            self.subscribers.append(StreamSubscriber(player_id, since, send, close))
+
+    def run(self):
+        interval = 1.0 / self.tick_rate
+        next_tick = time.monotonic()
+        while self.running:
+            self.broadcast()
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Tertinggal (server terlalu sibuk): lewati tick yang terlewat, jangan menumpuk
+                next_tick = time.monotonic()
+
+    def broadcast(self):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        dead = []
+        now = time.monotonic()
+        # Byte yang dikirim dihitung sekali per tick, bukan per subscriber
+        sent = 0
+        player_rooms = self.httpserver.player_rooms
+        for sub in subscribers:
+            try:
+                # Pemain tanpa room (room di-reset, pemain dibuang): kirim satu state terakhir lalu tutup
+                gone = sub.player_id not in player_rooms
+                # Subscriber di room dan versi yang sama berbagi body JSON yang sudah di-encode
+                state, body = self.httpserver.encoded_game_state(sub.player_id, sub.since, False)
+                changed = state['full'] or state['players'] or state['removed'] or 'game_started' in state
+                if changed:
+                    event = chunk(b'data: ' + body + b'\n\n')
+                elif now - sub.last_sent >= self.HEARTBEAT_INTERVAL:
+                    event = chunk(b': ping\n\n')
+                else:
+                    event = None
+                if event:
+                    sub.send(event)
+                    sub.last_sent = now
+                    sent += len(event)
+                sub.since = state['version']
+                if gone:
+                    # Chunk kosong mengakhiri body chunked agar klien melihat stream selesai, bukan terputus
+                    sub.send(b'0\r\n\r\n')
+                    dead.append(sub)
+            except Exception as e:
+                self.logger.debug(f"Dropping stream for player {sub.player_id}: {e}")
+                dead.append(sub)
+        if dead:
+            for sub in dead:
+                try:
+                    sub.close()
+                except Exception:
+                    pass
+            with self.lock:
+                self.subscribers = [s for s in self.subscribers if s not in dead]
+        if sent:
+            self.httpserver.metrics.add('dinorun_bytes_sent_total', sent)
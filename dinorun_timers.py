@@ -0,0 +1,73 @@
+# FILE: dinorun_timers.py
+# Scheduler housekeeping server: heap berisi deadline (time.monotonic) yang dijalankan oleh satu
+# thread latar. Dipakai untuk membuang pemain tidak aktif dan me-reset room yang sudah selesai,
+# sehingga pekerjaan itu tidak lagi menumpang di request /gamestate.
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+class DeadlineScheduler:
+    """Menjalankan callback saat deadline-nya lewat. Callback boleh mengembalikan deadline baru
+    untuk menjadwalkan dirinya lagi (dipakai untuk cek idle: pemain yang masih aktif cukup
+    diundur, tanpa menjadwal ulang setiap kali last_seen berubah)."""
+
+    def __init__(self):
+        self.heap = []
+        # Nomor urut sebagai pemecah seri agar callback tidak pernah dibandingkan
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+
+    def schedule(self, deadline, callback, *args):
+        with self.condition:
+            sequence = next(self.sequence)
+            heapq.heappush(self.heap, (deadline, sequence, callback, args))
+            # Bangunkan thread hanya jika deadline ini menjadi yang paling awal
+            if self.heap[0][1] == sequence:
+                self.condition.notify()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='housekeeping', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread:
+            self.thread.join()
+
+    def run(self):
+        while self.running:
+            with self.condition:
+                timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+                if timeout is None or timeout > 0:
+                    self.condition.wait(timeout)
+                    continue
+            self.run_due(time.monotonic())
+
+    def run_due(self, now):
+        """Menjalankan semua callback yang deadline-nya <= now; mengembalikan jumlahnya."""
+        count = 0
+        while True:
+            with self.condition:
+                if not self.heap or self.heap[0][0] > now:
+                    return count
+                _, _, callback, args = heapq.heappop(self.heap)
+            count += 1
+            try:
+                deadline = callback(*args)
+            except Exception as e:
+                self.logger.error(f"Housekeeping task {getattr(callback, '__name__', callback)} failed: {e}")
+                continue
+            if deadline is not None:
+                self.schedule(deadline, callback, *args)
@@ -0,0 +1,76 @@
+import math
+import struct
+
+# Encoding biner ringkas untuk endpoint panas (/input dan /gamestate).
+# Dinegosiasikan lewat header Content-Type (body request) dan Accept (body response);
+# request tanpa header ini tetap memakai JSON.
+CONTENT_TYPE = 'application/x-dinorun'
+
+# /input: player_id, token pemain (dari /register), tick, tombol (jump/duck) -> 17 byte
+INPUT = struct.Struct('<IQIB')
+# /gamestate: version, room_id, flags, seed, winner_id, winner_score, jumlah pemain, jumlah removed
+STATE_HEADER = struct.Struct('<QIBIIIHH')
+# Per pemain: id, state, x, y, flags, score -> 18 byte
+PLAYER = struct.Struct('<IBffBI')
+REMOVED = struct.Struct('<I')
+
+PLAYER_STATES = ('waiting', 'ready', 'playing', 'game_over')
+STATE_CODES = {name: code for code, name in enumerate(PLAYER_STATES)}
+
+# Flag pemain
+JUMPING, DUCKING = 0x01, 0x02
+# Flag header state
+FULL, HAS_STARTED, STARTED, HAS_WINNER = 0x01, 0x02, 0x04, 0x08
+
+def _player_flags(data):
+    return (JUMPING if data.get('is_jumping') else 0) | (DUCKING if data.get('is_ducking') else 0)
+
+def encode_input(data):
+    return INPUT.pack(int(data['player_id']), int(data['token'], 16), data['tick'],
+                      (JUMPING if data.get('jump') else 0) | (DUCKING if data.get('duck') else 0))
+
+def decode_input(body):
+    player_id, token, tick, flags = INPUT.unpack(body)
+    return {'player_id': str(player_id), 'token': '%016x' % token, 'tick': tick,
+            'jump': bool(flags & JUMPING), 'duck': bool(flags & DUCKING)}
+
+def encode_state(state):
+    """Encode hasil HttpServer.get_game_state. Posisi yang belum pernah dikirim pemain
+    di-encode sebagai NaN dan dihilangkan lagi saat decode."""
+    flags = FULL if state.get('full') else 0
+    if 'game_started' in state:
+        flags |= HAS_STARTED | (STARTED if state['game_started'] else 0)
+    winner = state.get('winner')
+    if winner:
+        flags |= HAS_WINNER
+    players, removed = state.get('players', {}), state.get('removed', [])
+    parts = [STATE_HEADER.pack(state['version'], int(state.get('room_id') or 0), flags, state.get('seed') or 0,
+                               int(winner['id']) if winner else 0, (winner['score'] or 0) if winner else 0,
+                               len(players), len(removed))]
+    for pid, p in players.items():
+        x, y = p.get('x'), p.get('y')
+        parts.append(PLAYER.pack(int(pid), STATE_CODES.get(p.get('state'), 0),
+                                 math.nan if x is None else x, math.nan if y is None else y,
+                                 _player_flags(p), p.get('score') or 0))
+    parts.extend(REMOVED.pack(int(pid)) for pid in removed)
+    return b''.join(parts)
+
+def decode_state(body):
+    """Kebalikan encode_state; menghasilkan dict dengan bentuk yang sama seperti JSON /gamestate."""
+    version, room_id, flags, seed, winner_id, winner_score, n_players, n_removed = STATE_HEADER.unpack_from(body, 0)
+    state = {'room_id': str(room_id) if room_id else None, 'version': version, 'full': bool(flags & FULL)}
+    if flags & HAS_STARTED:
+        state['game_started'] = bool(flags & STARTED)
+        state['seed'] = seed if flags & STARTED else None
+        state['winner'] = {'id': str(winner_id), 'score': winner_score} if flags & HAS_WINNER else None
+    players = {}
+    offset = STATE_HEADER.size
+    for pid, code, x, y, pflags, score in PLAYER.iter_unpack(body[offset:offset + n_players * PLAYER.size]):
+        p = {'state': PLAYER_STATES[code], 'score': score}
+        if not math.isnan(x):
+            p.update({'x': x, 'y': y, 'is_jumping': bool(pflags & JUMPING), 'is_ducking': bool(pflags & DUCKING)})
+        players[str(pid)] = p
+    offset += n_players * PLAYER.size
+    state['players'] = players
+    state['removed'] = [str(pid) for (pid,) in REMOVED.iter_unpack(body[offset:offset + n_removed * REMOVED.size])]
+    return state
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from dinorun_http import HttpServer
+from dinorun_parser import RequestParser, ParseError
+from dinorun_stream import StateBroadcaster
+
+# Konfigurasi logging dari server dinorun
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Instance global dari HttpServer (dipakai bersama oleh semua koneksi di satu event loop)
+httpserver = HttpServer()
+# Push state ke klien /stream dari thread terpisah; penulisan ke socket dititipkan ke loop
+broadcaster = StateBroadcaster(httpserver)
+metrics = httpserver.metrics
+
+# Koneksi idle hanya memegang satu socket, bukan worker, tetapi tetap dilepas agar fd tidak menumpuk
+KEEPALIVE_TIMEOUT = 5.0
+# Klien stream yang menumpuk lebih dari ini di buffer tulis dianggap terlalu lambat dan diputus
+STREAM_MAX_BUFFER = 64 * 1024
+
+class ProcessTheClient(asyncio.Protocol):
+    """Menangani koneksi dari satu klien di event loop (HTTP/1.1 keep-alive)."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.parser = RequestParser()
+        address = transport.get_extra_info('peername') or ('?', 0)
+        self.client_info = f"{address[0]}:{address[1]}"
+        self.last_activity = time.monotonic()
+        # Satu timer per koneksi; dijadwal ulang secara malas saat berbunyi, bukan setiap request
+        self.idle_timer = asyncio.get_running_loop().call_later(KEEPALIVE_TIMEOUT, self.check_idle)
+        self.streaming = False
+        logger.debug(f"New connection from {self.client_info}")
+        metrics.add('dinorun_connections_total')
+        metrics.add('dinorun_connections_active')
+
+    def data_received(self, data):
+        self.last_activity = time.monotonic()
+        metrics.add('dinorun_bytes_received_total', len(data))
+        try:
+            # Request pipelined dijawab berurutan; transport menampung response sampai bisa dikirim
+            for request in self.parser.feed(data):
+                logger.debug(f"Request from {self.client_info}: {request.method} {request.target}")
+
+                stream = httpserver.stream_request(request)
+                if stream:
+                    self.start_stream(*stream)
+                    return
+
+                # Router yang sama dengan server thread pool, dijalankan langsung di loop
+                self.write(httpserver.proses(request))
+
+                if not request.keep_alive:
+                    self.transport.close()
+                    return
+        except ParseError as e:
+            logger.debug(f"Bad request from {self.client_info}: {e}")
+            self.write(httpserver.error_response(e))
+            self.transport.close()
+        except Exception as e:
+            logger.error(f"Error handling client {self.client_info}: {e}")
+            self.transport.close()
+
+    def write(self, data):
+        metrics.add('dinorun_bytes_sent_total', len(data))
+        self.transport.write(data)
+
+    def start_stream(self, player_id, since):
+        # Koneksi stream tidak lagi membaca request dan tidak terkena timeout idle
+        self.idle_timer.cancel()
+        self.streaming = True
+        metrics.add('dinorun_connections_active', -1)
+        self.write(httpserver.stream_response())
+        loop = asyncio.get_running_loop()
+        transport = self.transport
+
+        def send(data):
+            if transport.is_closing() or transport.get_write_buffer_size() > STREAM_MAX_BUFFER:
+                raise ConnectionError("stream closed or client too slow")
+            loop.call_soon_threadsafe(transport.write, data)
+
+        broadcaster.subscribe(player_id, since, send, lambda: loop.call_soon_threadsafe(transport.close))
+
+    def check_idle(self):
+        idle = time.monotonic() - self.last_activity
+        if idle >= KEEPALIVE_TIMEOUT:
+            logger.debug(f"Idle timeout for client {self.client_info}")
+            self.transport.close()
+        else:
+            self.idle_timer = asyncio.get_running_loop().call_later(KEEPALIVE_TIMEOUT - idle, self.check_idle)
+
+    def connection_lost(self, exc):
+        self.idle_timer.cancel()
+        if not self.streaming: metrics.add('dinorun_connections_active', -1)
+        if isinstance(exc, ConnectionResetError):
+            logger.warning(f"Connection reset by client {self.client_info}")
+        logger.debug(f"Connection closed for {self.client_info}")
+
+async def serve(host, port, sockets=None):
+    loop = asyncio.get_running_loop()
+    if sockets is None:
+        servers = [await loop.create_server(ProcessTheClient, host, port, reuse_address=True, backlog=1024)]
+    else:
+        # Socket yang sudah di-bind oleh server_multiprocess (port bersama + port privat worker)
+        servers = [await loop.create_server(ProcessTheClient, sock=sock, backlog=1024) for sock in sockets]
+    addresses = ', '.join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for server in servers for s in server.sockets)
+    logger.info(f"DinoRun Game Server (asyncio) listening on {addresses}")
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+def Server(host='0.0.0.0', port=55555, tick_rate=30, sockets=None):
+    """Server event loop satu thread: ribuan socket bersamaan tanpa batas jumlah worker."""
+    broadcaster.tick_rate = tick_rate
+    broadcaster.start()
+    httpserver.start_simulation()
+    httpserver.start_housekeeping()
+    httpserver.start_match_log()
+    try:
+        asyncio.run(serve(host, port, sockets))
+    except KeyboardInterrupt:
+        logger.info("Server shutdown requested")
+    except Exception as e:
+        logger.error(f"Server failed to start: {e}")
+    finally:
+        broadcaster.stop()
+        httpserver.stop_match_log()
+        logger.info("Server socket closed")
+
+if __name__ == "__main__":
+    Server()
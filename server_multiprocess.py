@@ -0,0 +1,97 @@
+# FILE: server_multiprocess.py
+# Mode multi-proses: N proses worker, masing-masing menjalankan HttpServer sendiri (mode thread
+# atau async) sehingga GIL tidak lagi membatasi server pada satu core. Setiap room hidup di satu
+# worker. Pemain masuk lewat port publik (SO_REUSEPORT membagi koneksi ke semua worker), lalu
+# /register mengembalikan port privat worker yang memegang room-nya (port+1+indeks worker);
+# semua request berikutnya langsung ke port itu. Id pemain kongruen dengan indeks worker, jadi
+# request yang salah alamat bisa dijawab 421 beserta port yang benar. Room baru diisi bergiliran
+# per worker (satu indeks bersama), /register di worker lain juga dijawab 421.
+
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+from dinorun_matchlog import DEFAULT_PATH as DEFAULT_MATCH_LOG, repair_log
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def bind_socket(host, port, reuse_port=False):
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    listen_socket.bind((host, port))
+    listen_socket.listen(1024)
+    return listen_socket
+
+def raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def load_server_module(mode):
+    if mode == 'async':
+        import server_async_http as server_module
+    else:
+        import server_thread_pool_http as server_module
+    return server_module
+
+def run_server(server_module, mode, host, port, max_workers, tick_rate, sockets=None):
+    if mode == 'async':
+        server_module.Server(host, port, tick_rate=tick_rate, sockets=sockets)
+    else:
+        server_module.Server(host, port, max_workers=max_workers, tick_rate=tick_rate, sockets=sockets)
+
+def prepare_match_log():
+    """Membuang record terpotong di log match sekali, sebelum worker mulai menambahkan record
+    ke file bersama (truncate di setiap worker akan berebut dengan append worker lain)."""
+    path = os.getenv('MATCH_LOG', DEFAULT_MATCH_LOG)
+    if path:
+        count, dropped = repair_log(path)
+        if dropped: logger.warning(f"Truncated {dropped} bytes of incomplete records from {path}")
+        logger.info(f"{count} matches already recorded in {path}")
+
+def worker_main(index, ports, matchmaker, session, host, port, mode, max_workers, tick_rate, shared_socket):
+    """Entry point satu proses worker."""
+    # Tanpa SO_REUSEPORT semua worker accept() dari satu socket yang dibuat induk sebelum fork (prefork)
+    public_socket = shared_socket or bind_socket(host, port, reuse_port=True)
+    sockets = [public_socket, bind_socket(host, ports[index])]
+    # Worker dihentikan induk dengan SIGTERM; lewat KeyboardInterrupt agar log match sempat di-flush
+    signal.signal(signal.SIGTERM, raise_interrupt)
+    server_module = load_server_module(mode)
+    server_module.httpserver.configure_worker(index, ports, matchmaker, session)
+    logger.info(f"Worker {index} (pid {multiprocessing.current_process().pid}) serving rooms on port {ports[index]}")
+    run_server(server_module, mode, host, port, max_workers, tick_rate, sockets)
+
+def Server(host='0.0.0.0', port=55555, processes=4, mode='thread', max_workers=32, tick_rate=30):
+    if processes < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        # Socket listen tidak bisa diwariskan ke worker tanpa fork; jalankan server satu proses biasa
+        if processes > 1: logger.warning("fork is not available on this platform; running a single process")
+        run_server(load_server_module(mode), mode, host, port, max_workers, tick_rate)
+        return
+    ports = [port + 1 + i for i in range(processes)]
+    prepare_match_log()
+    shared_socket = None if hasattr(socket, 'SO_REUSEPORT') else bind_socket(host, port)
+    context = multiprocessing.get_context('fork')
+    # Indeks worker yang sedang mengisi room baru; digilir oleh worker itu sendiri (lihat HttpServer.matchmaker_port)
+    matchmaker = context.Value('i', 0)
+    # Sesi bersama untuk log match: id pemain unik di seluruh worker dalam satu run server
+    session = random.getrandbits(32)
+    workers = [context.Process(target=worker_main, name=f'dinorun-worker-{i}',
+                               args=(i, ports, matchmaker, session, host, port, mode, max_workers, tick_rate, shared_socket))
+               for i in range(processes)]
+    for worker in workers: worker.start()
+    # SIGTERM (docker stop) diperlakukan seperti Ctrl+C agar worker ikut dihentikan
+    signal.signal(signal.SIGTERM, raise_interrupt)
+    logger.info(f"DinoRun Game Server: {processes} {mode} workers on {host}:{port}, private ports {ports[0]}-{ports[-1]}")
+    try:
+        for worker in workers: worker.join()
+    except KeyboardInterrupt:
+        logger.info("Server shutdown requested")
+    finally:
+        for worker in workers:
+            if worker.is_alive(): worker.terminate()
+        for worker in workers: worker.join()
+        if shared_socket: shared_socket.close()
+        logger.info("All workers stopped")
@@ -1,109 +1,272 @@
-import socket
-import time
-import sys
-import logging
-from concurrent.futures import ThreadPoolExecutor
-from dinorun_http import HttpServer  # Mengimpor kelas gabungan yang baru
-import threading
-
-# Konfigurasi logging dari server dinorun
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-# Instance global dari HttpServer
-httpserver = HttpServer()
-
-def ProcessTheClient(connection, address):
-    """Menangani koneksi dari satu klien."""
-    rcv = ""
-    client_info = f"{address[0]}:{address[1]}"
-    logger.info(f"New connection from {client_info}")
-    
-    try:
-        connection.settimeout(10.0) # Timeout untuk koneksi
-        
-        # Loop untuk menerima data hingga command lengkap
-        while True:
-            try:
-                data = connection.recv(1024)
-                if data:
-                    d = data.decode('utf-8', errors='ignore')
-                    rcv += d
-                    
-                    # --- THIS IS THE CORRECTED LINE ---
-                    # Command game diakhiri dengan '\n', request HTTP dengan '\r\n'
-                    if rcv.endswith('\n') or '\r\n\r\n' in rcv:
-                        request = rcv.strip()
-                        logger.debug(f"Request from {client_info}: {request}")
-                        
-                        # Proses request menggunakan instance httpserver
-                        hasil = httpserver.proses(request)
-                        
-                        # Kirim balasan
-                        if isinstance(hasil, bytes):
-                            # Jika balasan BUKAN response HTTP, tambahkan terminator
-                            if not hasil.startswith(b"HTTP/"):
-                                hasil += b"\r\n\r\n"
-                        else:
-                            # Fallback jika hasil bukan bytes
-                            hasil = str(hasil).encode() + b"\r\n\r\n"
-
-                        connection.sendall(hasil)
-                        logger.debug(f"Response sent to {client_info}")
-                        
-                        # Keluar dari loop setelah satu siklus request-response
-                        # Klien dinorun membuka koneksi baru untuk setiap command
-                        break 
-                else:
-                    # Klien menutup koneksi
-                    break
-            except socket.timeout:
-                logger.warning(f"Timeout for client {client_info}")
-                break
-            except ConnectionResetError:
-                logger.warning(f"Connection reset by client {client_info}")
-                break
-            except Exception as e:
-                logger.error(f"Error handling client {client_info}: {e}")
-                break
-    finally:
-        connection.close()
-        logger.debug(f"Connection closed for {client_info}")
-
-def Server():
-    """Fungsi utama server."""
-    HOST = '0.0.0.0'
-    PORT = 55555      # Port dari game dinorun
-    MAX_WORKERS = 10  # Jumlah worker dari game dinorun
-
-    my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
-    try:
-        my_socket.bind((HOST, PORT))
-        my_socket.listen(10)
-        logger.info(f"DinoRun Game Server listening on {HOST}:{PORT}")
-
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            while True:
-                try:
-                    connection, client_address = my_socket.accept()
-                    executor.submit(ProcessTheClient, connection, client_address)
-                except KeyboardInterrupt:
-                    logger.info("Server shutdown requested")
-                    break
-                except Exception as e:
-                    logger.error(f"Error accepting connection: {e}")
-    except Exception as e:
-        logger.error(f"Server failed to start: {e}")
-    finally:
-        my_socket.close()
-        logger.info("Server socket closed")
-
-if __name__ == "__main__":
-    try:
-        Server()
-    except KeyboardInterrupt:
-        logger.info("Server stopped by user")
-    finally:
+import socket
+import time
+import sys
+import os
+import argparse
+import logging
+import select
+from concurrent.futures import ThreadPoolExecutor
+from dinorun_http import HttpServer  # Mengimpor kelas gabungan yang baru
+from dinorun_parser import RequestParser, ParseError
+from dinorun_stream import StateBroadcaster
+import threading
+
+# Konfigurasi logging dari server dinorun
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Instance global dari HttpServer
+httpserver = HttpServer()
+# Push state ke klien /stream; tick rate diatur saat Server() dijalankan
+broadcaster = StateBroadcaster(httpserver)
+metrics = httpserver.metrics
+
+# Koneksi keep-alive yang diam tidak memegang worker: setelah request yang tersedia dijawab,
+# socket dikembalikan ke IdlePoller (satu thread epoll) sampai ada data lagi, lalu dilepas
+# jika diam lebih dari KEEPALIVE_TIMEOUT. Timeout yang sama juga membatasi sendall ke klien lambat.
+KEEPALIVE_TIMEOUT = 5.0
+# Berapa lama worker menunggu request berikutnya sebelum koneksi dikembalikan ke poller (detik)
+KEEPALIVE_LINGER = 0.001
+RECV_SIZE = 65536
+
+def wait_readable(sock, timeout):
+    poller = select.poll()
+    poller.register(sock, select.POLLIN)
+    return bool(poller.poll(timeout * 1000))
+
+class Connection:
+    """Satu koneksi klien. Parser ikut berpindah antara worker dan IdlePoller sehingga request
+    yang terpotong di antara dua recv tetap tersambung."""
+    __slots__ = ('socket', 'fd', 'client_info', 'parser', 'last_activity', 'busy')
+
+    def __init__(self, sock, address):
+        self.socket = sock
+        self.fd = sock.fileno()
+        # True selama koneksi dijawab worker (tidak dipantau poller dan tidak terkena timeout idle)
+        self.busy = False
+        self.client_info = f"{address[0]}:{address[1]}"
+        self.parser = RequestParser()
+        self.last_activity = time.monotonic()
+
+def close_connection(conn, poller):
+    poller.forget(conn)
+    metrics.add('dinorun_connections_active', -1)
+    conn.socket.close()
+    logger.debug(f"Connection closed for {conn.client_info}")
+
+class IdlePoller:
+    """Menunggu data di semua koneksi keep-alive yang sedang idle dengan satu epoll. Koneksi
+    didaftarkan EPOLLONESHOT: begitu bisa dibaca, koneksi diserahkan ke pool worker dan epoll
+    berhenti memantaunya sampai worker mengembalikannya dengan park() (satu epoll_ctl, tanpa
+    membangunkan thread poller)."""
+    EVENTS = select.EPOLLIN | select.EPOLLONESHOT if hasattr(select, 'epoll') else 0
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.epoll = select.epoll()
+        # fd -> Connection untuk semua koneksi yang dipegang poller atau sedang dijawab worker
+        self.connections = {}
+        metrics.gauge('dinorun_idle_connections', 'Keep-alive connections waiting for their next request',
+                      lambda: sum(not conn.busy for conn in list(self.connections.values())))
+
+    def add(self, conn):
+        self.connections[conn.fd] = conn
+        self.epoll.register(conn.fd, self.EVENTS)
+
+    def backlog(self):
+        """Jumlah koneksi yang sudah bisa dibaca tetapi masih menunggu worker bebas."""
+        return self.executor._work_queue.qsize()
+
+    def park(self, conn):
+        conn.busy = False
+        self.epoll.modify(conn.fd, self.EVENTS)
+
+    def forget(self, conn):
+        self.connections.pop(conn.fd, None)
+        try:
+            self.epoll.unregister(conn.fd)
+        except OSError:
+            pass
+
+    def run(self):
+        next_check = time.monotonic() + 1.0
+        while True:
+            for fd, _ in self.epoll.poll(1.0):
+                conn = self.connections.get(fd)
+                if conn is not None:
+                    conn.busy = True
+                    self.executor.submit(ProcessTheClient, conn, self)
+            now = time.monotonic()
+            if now >= next_check:
+                # Timeout idle dicek sekali per detik, bukan per koneksi
+                next_check = now + 1.0
+                for conn in list(self.connections.values()):
+                    if not conn.busy and now - conn.last_activity >= KEEPALIVE_TIMEOUT:
+                        logger.debug(f"Idle timeout for client {conn.client_info}")
+                        close_connection(conn, self)
+
+def ProcessTheClient(conn, poller):
+    """Menjawab request yang sudah tersedia di satu koneksi (HTTP/1.1 keep-alive, bisa pipelined),
+    lalu mengembalikan koneksi ke poller. Worker paling lama menunggu KEEPALIVE_LINGER untuk
+    request berikutnya, tidak pernah sampai KEEPALIVE_TIMEOUT."""
+    connection, client_info = conn.socket, conn.client_info
+    try:
+        while True:
+            data = connection.recv(RECV_SIZE)
+            if not data:
+                # Klien menutup koneksi
+                close_connection(conn, poller)
+                return
+            conn.last_activity = time.monotonic()
+            metrics.add('dinorun_bytes_received_total', len(data))
+            try:
+                requests = conn.parser.feed(data)
+            except ParseError as e:
+                logger.debug(f"Bad request from {client_info}: {e}")
+                connection.sendall(httpserver.error_response(e))
+                close_connection(conn, poller)
+                return
+
+            # Request pipelined dijawab berurutan dan dikirim dalam satu sendall
+            responses, keep_alive = [], True
+            for request in requests:
+                logger.debug(f"Request from {client_info}: {request.method} {request.target}")
+                stream = httpserver.stream_request(request)
+                if stream:
+                    # Socket diserahkan ke broadcaster dan tidak kembali ke poller. Socket dibuat
+                    # non-blocking: klien yang tidak sanggup menerima satu event langsung diputus.
+                    responses.append(httpserver.stream_response())
+                    out = b''.join(responses)
+                    connection.sendall(out)
+                    metrics.add('dinorun_bytes_sent_total', len(out))
+                    metrics.add('dinorun_connections_active', -1)
+                    poller.forget(conn)
+                    connection.setblocking(False)
+                    broadcaster.subscribe(stream[0], stream[1], connection.sendall, connection.close)
+                    return
+
+                # Proses request menggunakan instance httpserver
+                responses.append(httpserver.proses(request))
+                if not request.keep_alive:
+                    keep_alive = False
+                    break
+            if responses:
+                out = b''.join(responses)
+                connection.sendall(out)
+                metrics.add('dinorun_bytes_sent_total', len(out))
+                logger.debug(f"Response sent to {client_info}")
+            if not keep_alive:
+                close_connection(conn, poller)
+                return
+            # Klien yang langsung mengirim request berikutnya (loop ketat, load generator) tetap dilayani
+            # worker ini, kecuali ada koneksi lain yang sedang menunggu worker; klien game yang baru
+            # mengirim lagi puluhan ms kemudian menunggu di poller
+            if poller.backlog() or not wait_readable(connection, KEEPALIVE_LINGER):
+                break
+    except ConnectionResetError:
+        logger.warning(f"Connection reset by client {client_info}")
+        close_connection(conn, poller)
+        return
+    except (socket.timeout, ConnectionError) as e:
+        logger.debug(f"Connection error for client {client_info}: {e}")
+        close_connection(conn, poller)
+        return
+    except Exception as e:
+        logger.error(f"Error handling client {client_info}: {e}")
+        close_connection(conn, poller)
+        return
+    poller.park(conn)
+
+def AcceptLoop(listen_socket, poller):
+    """Menerima koneksi dari satu socket listen; koneksi baru langsung menunggu di poller."""
+    while True:
+        try:
+            connection, client_address = listen_socket.accept()
+            connection.settimeout(KEEPALIVE_TIMEOUT)
+            # Log per koneksi hanya di level debug; jumlahnya ada di /metrics
+            logger.debug(f"New connection from {client_address[0]}:{client_address[1]}")
+            metrics.add('dinorun_connections_total')
+            metrics.add('dinorun_connections_active')
+            poller.add(Connection(connection, client_address))
+        except OSError as e:
+            if listen_socket.fileno() < 0:
+                break
+            logger.error(f"Error accepting connection: {e}")
+
+def Server(host='0.0.0.0', port=55555, max_workers=32, tick_rate=30, sockets=None):
+    """Fungsi utama server (worker hanya dipakai selama request dijawab). `sockets` berisi socket
+    listen yang sudah di-bind (mode multi-proses); tanpa itu server mem-bind host:port sendiri."""
+    if not hasattr(select, 'epoll'):
+        # IdlePoller butuh epoll (Linux); di platform lain event loop asyncio melayani koneksi idle
+        logger.warning("epoll is not available on this platform; using the async server instead")
+        import server_async_http
+        server_async_http.Server(host, port, tick_rate=tick_rate, sockets=sockets)
+        return
+    broadcaster.tick_rate = tick_rate
+    broadcaster.start()
+    httpserver.start_simulation()
+    httpserver.start_housekeeping()
+    httpserver.start_match_log()
+    if sockets is None:
+        my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sockets = [my_socket]
+        try:
+            my_socket.bind((host, port))
+            my_socket.listen(128)
+        except Exception as e:
+            logger.error(f"Server failed to start: {e}")
+            broadcaster.stop()
+            httpserver.stop_match_log()
+            my_socket.close()
+            return
+
+    try:
+        addresses = ', '.join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in sockets)
+        logger.info(f"DinoRun Game Server listening on {addresses} ({max_workers} workers)")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Koneksi yang sudah punya data tetapi belum mendapat worker (semua worker sedang menjawab request)
+            metrics.gauge('dinorun_threadpool_queue_depth', 'Readable connections waiting for a free worker',
+                          executor._work_queue.qsize)
+            poller = IdlePoller(executor)
+            threading.Thread(target=poller.run, name='idle-poller', daemon=True).start()
+            # Socket tambahan (port privat worker) dilayani thread accept sendiri
+            for extra in sockets[1:]:
+                threading.Thread(target=AcceptLoop, args=(extra, poller), daemon=True).start()
+            AcceptLoop(sockets[0], poller)
+    except KeyboardInterrupt:
+        logger.info("Server shutdown requested")
+    except Exception as e:
+        logger.error(f"Server failed to start: {e}")
+    finally:
+        broadcaster.stop()
+        httpserver.stop_match_log()
+        for s in sockets: s.close()
+        logger.info("Server socket closed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DinoRun Game Server")
+    parser.add_argument('--mode', choices=['thread', 'async'], default=os.getenv('SERVER_MODE', 'thread'),
+                        help="thread: ThreadPoolExecutor, async: asyncio event loop")
+    parser.add_argument('--port', type=int, default=55555)
+    parser.add_argument('--workers', type=int, default=32, help="Jumlah worker untuk mode thread")
+    parser.add_argument('--tick-rate', type=int, default=int(os.getenv('TICK_RATE', '30')),
+                        help="Frekuensi push state ke klien /stream (Hz)")
+    parser.add_argument('--processes', type=int, default=int(os.getenv('SERVER_PROCESSES', '1')),
+                        help="Jumlah proses worker; >1 memakai SO_REUSEPORT dan port privat port+1..port+N")
+    args = parser.parse_args()
+    try:
+        if args.processes > 1:
+            import server_multiprocess
+            server_multiprocess.Server(port=args.port, processes=args.processes, mode=args.mode,
+                                       max_workers=args.workers, tick_rate=args.tick_rate)
+        elif args.mode == 'async':
+            import server_async_http
+            server_async_http.Server(port=args.port, tick_rate=args.tick_rate)
+        else:
+            Server(port=args.port, max_workers=args.workers, tick_rate=args.tick_rate)
+    except KeyboardInterrupt:
+        logger.info("Server stopped by user")
+    finally:
         logger.info("Server shutdown complete")
\ No newline at end of file